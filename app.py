@@ -10,17 +10,28 @@ Features:
 ================================================================================
 """
 
-from flask import Flask, render_template_string, jsonify, request
+from flask import Flask, Response, request
+from flask.json.provider import DefaultJSONProvider
 import json
+import gzip
+import hashlib
+import base64
+import atexit
 import os
 import time
 import threading
+import queue
 import logging
 import math
 import random
-from datetime import datetime, timedelta
+import re
+import uuid
+from collections import deque
+from functools import lru_cache
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta, timezone
 from typing import Optional, List, Dict
-import calendar
+from itertools import accumulate
 
 app = Flask(__name__)
 
@@ -55,6 +66,7 @@ IC_CALL_SELL_DISTANCE = int(os.environ.get("IC_CALL_SELL_DISTANCE", "150"))
 IC_CALL_BUY_DISTANCE = int(os.environ.get("IC_CALL_BUY_DISTANCE", "250"))
 IC_PUT_SELL_DISTANCE = int(os.environ.get("IC_PUT_SELL_DISTANCE", "150"))
 IC_PUT_BUY_DISTANCE = int(os.environ.get("IC_PUT_BUY_DISTANCE", "250"))
+_IC_OFFSETS = (IC_CALL_SELL_DISTANCE, IC_CALL_BUY_DISTANCE, -IC_PUT_SELL_DISTANCE, -IC_PUT_BUY_DISTANCE)  # sc, bc, sp, bp from ATM
 IC_TARGET_PERCENT = int(os.environ.get("IC_TARGET_PERCENT", "50"))
 IC_STOP_LOSS_PERCENT = int(os.environ.get("IC_STOP_LOSS_PERCENT", "100"))
 STR_TARGET_PERCENT = int(os.environ.get("STR_TARGET_PERCENT", "30"))
@@ -85,6 +97,11 @@ IC_VIX_MIN = float(os.environ.get("IC_VIX_MIN", "9"))            # Don't enter I
 IC_STRIKE_MODE = os.environ.get("IC_STRIKE_MODE", "fixed")       # "fixed" or "dynamic"
 IC_MIN_CREDIT = float(os.environ.get("IC_MIN_CREDIT", "20"))     # Minimum net credit to enter IC
 
+# Pre-entry skip on a Black-Scholes credit estimate (flat VIX IV, no skew, day-granular DTE).
+# The estimate can undershoot real quotes, so it only skips when estimate * (1 + margin) is
+# still below the minimum; 0 turns the skip off and every entry is decided on live quotes.
+PREDICTED_CREDIT_MARGIN = float(os.environ.get("PREDICTED_CREDIT_MARGIN", "0"))
+
 # Per-leg stop loss: exit threatened side independently
 IC_LEG_SL_ENABLED = os.environ.get("IC_LEG_SL_ENABLED", "true").lower() == "true"
 IC_LEG_SL_PERCENT = int(os.environ.get("IC_LEG_SL_PERCENT", "150"))  # Exit a spread when it loses 150% of its credit
@@ -118,10 +135,15 @@ TRADING_DAYS = [0, 1, 2, 3, 4]  # Monday to Friday
 MIN_PREMIUM = int(os.environ.get("MIN_PREMIUM", "10"))  # Lowered to 10
 CHARGES_PER_LOT = int(os.environ.get("CHARGES_PER_LOT", "100"))
 CHECK_INTERVAL = int(os.environ.get("CHECK_INTERVAL", "60"))  # Increased to 60 seconds to avoid rate limits
+CUSTOM_EXPIRY = os.environ.get("CUSTOM_EXPIRY", "")  # Holiday override, e.g. 17-02-2026 — empty = auto-detect
 
 # Auto-start trading
 AUTO_START = os.environ.get("AUTO_START", "true").lower() == "true"
 
+# Cross-replica entry guard (optional): prevents two running instances from both entering
+REDIS_URL = os.environ.get("REDIS_URL", "")                      # e.g. redis://host:6379/0 — empty = disabled
+ENTRY_LOCK_TTL = int(os.environ.get("ENTRY_LOCK_TTL", "300"))    # Seconds an unrefreshed lock stays valid
+
 PORT = int(os.environ.get("PORT", 5000))
 
 # Timezone handling for IST
@@ -138,18 +160,139 @@ def get_ist_now():
         return datetime.now(IST)
     return datetime.now()
 
+def atm_strike(spot) -> int:
+    """Round spot to the nearest 50-point strike (integer math, halves round up)"""
+    return ((int(spot) + 25) // 50) * 50
+
 # ============================================
 # DATA STORAGE - With Trade History Preservation
 # ============================================
 DATA_FILE = "bot_data.json"
-TRADE_HISTORY_FILE = "trade_history.json"
+TRADE_HISTORY_FILE = "trade_history.json"   # Backtest results (+ trades logged before the NDJSON log)
+TRADE_LOG_FILE = "trade_history.ndjson"      # Append-only: one closed trade per line
+TRADE_LOG_WINDOW = 1000                      # Most recent logged trades kept in memory
 POSITION_FILE = "live_position.json"
+BACKTEST_DIR = "backtests"                   # One NDJSON file of trades per backtest run
+LEG_FETCH_WORKERS = 4                        # Max parallel quote/premium fetches (an iron condor has 4 legs)
 
-def load_data():
+# Fast JSON codec for persistence (falls back to stdlib json)
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except:
+    ORJSON_AVAILABLE = False
+
+def read_json_file(path):
+    """Read a JSON file (orjson when available)"""
+    if ORJSON_AVAILABLE:
+        with open(path, 'rb') as f:
+            return orjson.loads(f.read())
+    with open(path, 'r') as f:
+        return json.load(f)
+
+def loads_json(raw: bytes):
+    """Parse JSON bytes (orjson when available)"""
+    if ORJSON_AVAILABLE:
+        return orjson.loads(raw)
+    return json.loads(raw)
+
+def write_json_file(path, obj):
+    """Write compact JSON atomically (orjson when available).
+    
+    The whole document is serialized up front and written in one call to a
+    temp file that then replaces `path`, so a crash or a concurrent reader
+    never sees a half-written file.
+    """
+    if ORJSON_AVAILABLE:
+        # NON_STR_KEYS: accept the int-keyed dicts stdlib json would have written
+        payload = orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS)
+    else:
+        payload = json.dumps(obj, separators=(",", ":")).encode("utf-8")
+    tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        with open(tmp, 'wb') as f:
+            f.write(payload)
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+
+# Write-behind for the JSON state files: save_data/save_position/save_trade_history
+# record the newest object per path and one writer thread persists it, so the bot
+# loop and request handlers never wait on disk. Until a path's write lands, its
+# loader serves the pending object instead of the (older) file.
+_pending_writes = {}
+_pending_lock = threading.Lock()
+_flush_lock = threading.Lock()  # One flush at a time, so an older snapshot can't land last
+_writer_wakeup = queue.Queue()
+_writer_pid = None
+
+def write_behind(path, obj):
+    """Queue `obj` to be written to `path`; a newer queued object replaces an unwritten older one"""
+    global _writer_pid
+    with _pending_lock:
+        _pending_writes[path] = obj
+        # Keyed on pid: threads don't survive gunicorn's fork of a preloaded app.
+        # Checked under the lock so concurrent first saves start a single writer.
+        if _writer_pid != os.getpid():
+            _writer_pid = os.getpid()
+            threading.Thread(target=_writer_loop, daemon=True).start()
+    _writer_wakeup.put(None)
+
+def pending_write(path):
+    """The object queued for `path` that hasn't reached disk yet, if any"""
+    with _pending_lock:
+        return _pending_writes.get(path)
+
+def flush_writes():
+    """Persist every pending state file now (writer thread, and atexit on shutdown)"""
+    with _flush_lock:
+        with _pending_lock:
+            batch = list(_pending_writes.items())
+        for path, obj in batch:
+            try:
+                write_json_file(path, obj)
+            except Exception as e:
+                logger.error(f"Save error ({path}): {e}")
+                continue
+            with _pending_lock:
+                # A newer save during the write stays pending for the next pass
+                if _pending_writes.get(path) is obj:
+                    del _pending_writes[path]
+
+def _writer_loop():
+    while True:
+        _writer_wakeup.get()
+        # Coalesce a burst of saves into one write per file
+        while True:
+            try:
+                _writer_wakeup.get_nowait()
+            except queue.Empty:
+                break
+        flush_writes()
+
+atexit.register(flush_writes)
+
+# Every dashboard request and bot tick calls load_data(); reuse the parsed file
+# for a second, then only re-parse it if its stat stamp changed. save_data()
+# updates this copy in place and hands it to write_behind().
+DATA_CACHE_TTL = 1.0
+_data_cache = {"expires_at": 0.0, "data": None, "stamp": None}
+_data_cache_lock = threading.Lock()
+
+def _data_file_stamp():
+    """(mtime_ns, size) of DATA_FILE, or None if it doesn't exist"""
+    try:
+        st = os.stat(DATA_FILE)
+    except OSError:
+        return None
+    return st.st_mtime_ns, st.st_size
+
+def _read_data_file():
     try:
         if os.path.exists(DATA_FILE):
-            with open(DATA_FILE, 'r') as f:
-                return json.load(f)
+            return read_json_file(DATA_FILE)
     except:
         pass
     return {
@@ -162,20 +305,46 @@ def load_data():
         "last_update": ""
     }
 
+def load_data():
+    """Bot state, memoized for DATA_CACHE_TTL seconds (or until its pending write lands).
+    
+    Callers get their own top-level dict and trades list, so they can
+    mutate and save_data() without touching the cached copy.
+    """
+    with _data_cache_lock:
+        now = time.monotonic()
+        if _data_cache["data"] is None or (now >= _data_cache["expires_at"] and pending_write(DATA_FILE) is None):
+            stamp = _data_file_stamp()
+            if _data_cache["data"] is None or stamp is None or stamp != _data_cache["stamp"]:
+                _data_cache["data"] = _read_data_file()
+                _data_cache["stamp"] = stamp
+            _data_cache["expires_at"] = now + DATA_CACHE_TTL
+        data = _data_cache["data"]
+    return {**data, "trades": list(data.get("trades", []))}
+
 def save_data(data):
-    try:
-        data["last_update"] = datetime.now().isoformat()
-        with open(DATA_FILE, 'w') as f:
-            json.dump(data, f, indent=2)
-    except Exception as e:
-        logger.error(f"Save error: {e}")
+    """Publish new bot state to load_data() now; the file write happens in the background"""
+    data["last_update"] = datetime.now().isoformat()
+    snapshot = {**data, "trades": list(data.get("trades", []))}
+    with _data_cache_lock:
+        _data_cache["data"] = snapshot
+        _data_cache["expires_at"] = time.monotonic() + DATA_CACHE_TTL
+        write_behind(DATA_FILE, snapshot)
+
+# This process is live_position.json's only writer, so the last saved (or first
+# loaded) position is kept in memory and the strategies' read-merge-save in
+# _save_position() never goes back to disk
+_position_state = {"data": None}
 
 def load_position():
     """Load current live position"""
+    cached = _position_state["data"]
+    if cached is not None:
+        return dict(cached)
     try:
         if os.path.exists(POSITION_FILE):
-            with open(POSITION_FILE, 'r') as f:
-                return json.load(f)
+            _position_state["data"] = read_json_file(POSITION_FILE)
+            return dict(_position_state["data"])
     except:
         pass
     return {
@@ -186,52 +355,109 @@ def load_position():
     }
 
 def save_position(position_data):
-    """Save current live position"""
-    try:
-        position_data["last_update"] = datetime.now().isoformat()
-        with open(POSITION_FILE, 'w') as f:
-            json.dump(position_data, f, indent=2)
-    except Exception as e:
-        logger.error(f"Save position error: {e}")
+    """Save current live position (written in the background)"""
+    position_data["last_update"] = datetime.now().isoformat()
+    snapshot = dict(position_data)
+    _position_state["data"] = snapshot
+    write_behind(POSITION_FILE, snapshot)
 
 def load_trade_history():
     """Load persistent trade history"""
+    pending = pending_write(TRADE_HISTORY_FILE)
+    if pending is not None:
+        return {**pending, "trades": list(pending.get("trades", [])),
+                "backtest_results": list(pending.get("backtest_results", []))}
     try:
         if os.path.exists(TRADE_HISTORY_FILE):
-            with open(TRADE_HISTORY_FILE, 'r') as f:
-                return json.load(f)
+            return read_json_file(TRADE_HISTORY_FILE)
     except:
         pass
     return {"trades": [], "backtest_results": []}
 
 def save_trade_history(history):
-    """Save persistent trade history"""
+    """Save persistent trade history (written in the background)"""
+    write_behind(TRADE_HISTORY_FILE, {**history, "trades": list(history.get("trades", [])),
+                                      "backtest_results": list(history.get("backtest_results", []))})
+
+# The trade log is only ever appended to; readers fold in just the bytes added
+# since their last look, so neither side rewrites or re-parses the whole history
+_trade_log = {"offset": 0, "count": 0, "recent": deque(maxlen=TRADE_LOG_WINDOW)}
+_trade_log_lock = threading.Lock()
+
+def append_trade_log(trade):
+    """Record a closed trade with one O(1) append"""
+    line = dumps_json(trade) + b"\n"
+    with _trade_log_lock:
+        with open(TRADE_LOG_FILE, 'ab') as f:
+            f.write(line)
+
+def _sync_trade_log():
     try:
-        with open(TRADE_HISTORY_FILE, 'w') as f:
-            json.dump(history, f, indent=2)
-    except Exception as e:
-        logger.error(f"Save trade history error: {e}")
+        size = os.path.getsize(TRADE_LOG_FILE)
+    except OSError:
+        return
+    if size < _trade_log["offset"]:  # File was replaced/truncated: start over
+        _trade_log.update(offset=0, count=0)
+        _trade_log["recent"].clear()
+    if size == _trade_log["offset"]:
+        return
+    with open(TRADE_LOG_FILE, 'rb') as f:
+        f.seek(_trade_log["offset"])
+        chunk = f.read(size - _trade_log["offset"])
+    end = chunk.rfind(b"\n") + 1  # Leave a partially written last line for next time
+    for line in chunk[:end].splitlines():
+        if line.strip():
+            try:
+                _trade_log["recent"].append(loads_json(line))
+                _trade_log["count"] += 1
+            except ValueError:
+                logger.warning("Skipping unreadable trade log line")
+    _trade_log["offset"] += end
+
+def trade_history() -> List[Dict]:
+    """Closed trades, oldest first: pre-log trades from TRADE_HISTORY_FILE, then the
+    last TRADE_LOG_WINDOW entries of the append-only log"""
+    legacy = load_trade_history().get("trades", [])
+    with _trade_log_lock:
+        _sync_trade_log()
+        recent = list(_trade_log["recent"])
+    return legacy + recent
 
 def add_trade(trade):
     # Add to session data
     data = load_data()
     trade['timestamp'] = datetime.now().isoformat()
     data["trades"].append(trade)
-    data["daily_pnl"] = data.get("daily_pnl", 0) + float(trade.get("pnl", 0))
-    data["total_pnl"] = sum(float(t.get('pnl', 0)) for t in data["trades"])
+    pnl = float(trade.get("pnl", 0))
+    data["daily_pnl"] = data.get("daily_pnl", 0) + pnl
+    # total_pnl is kept as a running sum; re-summing every trade made each add O(n)
+    data["total_pnl"] = data.get("total_pnl", 0) + pnl
     save_data(data)
     
     # Also save to persistent history
-    history = load_trade_history()
-    history["trades"].append(trade)
-    save_trade_history(history)
+    append_trade_log(trade)
+
+# (trade count, last_update) -> (winners, total_pnl); trades only change through save_data
+_summary_stats = (None, None)
 
 def get_summary():
+    global _summary_stats
     data = load_data()
     trades = data.get("trades", [])
     total_trades = len(trades)
-    winners = len([t for t in trades if float(t.get('pnl', 0)) > 0])
-    total_pnl = sum(float(t.get('pnl', 0)) for t in trades)
+    key = (total_trades, data.get("last_update", ""))
+    cached_key, stats = _summary_stats
+    if cached_key != key:
+        # One pass for both aggregates
+        winners = 0
+        total_pnl = 0
+        for t in trades:
+            pnl = float(t.get('pnl', 0))
+            total_pnl += pnl
+            winners += pnl > 0
+        stats = (winners, total_pnl)
+        _summary_stats = (key, stats)
+    winners, total_pnl = stats
     
     return {
         "total_trades": total_trades,
@@ -253,51 +479,46 @@ def get_summary():
 # ============================================
 def get_all_thursdays(year: int, month: int) -> List[datetime]:
     """Get all Thursdays in a given month"""
-    thursdays = []
-    cal = calendar.Calendar()
-    for day in cal.itermonthdays2(year, month):
-        if day[0] != 0 and day[1] == 3:  # Thursday = 3
-            thursdays.append(datetime(year, month, day[0]))
-    return thursdays
+    first = datetime(year, month, 1)
+    days_in_month = (first.replace(year=year + month // 12, month=month % 12 + 1) - first).days
+    return [first + timedelta(days=d) for d in range((3 - first.weekday()) % 7, days_in_month, 7)]
 
 def get_weekly_expiries(start_date: datetime, end_date: datetime) -> List[datetime]:
     """Generate all weekly expiry dates (Thursdays) between start and end date"""
+    # First Thursday on/after start_date, then step a week at a time
+    current = start_date.replace(hour=0, minute=0, second=0, microsecond=0)
+    current += timedelta(days=(3 - current.weekday()) % 7)
+    if current < start_date:
+        current += timedelta(days=7)
     expiries = []
-    current = start_date
-    
     while current <= end_date:
-        year = current.year
-        month = current.month
-        
-        thursdays = get_all_thursdays(year, month)
-        for thursday in thursdays:
-            if start_date <= thursday <= end_date:
-                expiries.append(thursday)
-        
-        # Move to next month
-        if month == 12:
-            current = datetime(year + 1, 1, 1)
-        else:
-            current = datetime(year, month + 1, 1)
-    
-    # Remove duplicates and sort
-    expiries = sorted(list(set(expiries)))
+        expiries.append(current)
+        current += timedelta(days=7)
     return expiries
 
 def parse_custom_expiry(expiry_str: str) -> datetime:
-    """Parse expiry date from various formats"""
-    formats = [
-        "%d-%m-%Y",    # 17-02-2026
-        "%Y-%m-%d",    # 2026-02-17
-        "%d-%b-%Y",    # 17-Feb-2026
-        "%d/%m/%Y",    # 17/02/2026
-    ]
-    for fmt in formats:
-        try:
-            return datetime.strptime(expiry_str.strip(), fmt)
-        except:
-            continue
-    return None
+    """Parse expiry date from various formats:
+    17-02-2026, 2026-02-17, 17-Feb-2026, 17/02/2026
+    
+    The format is picked from the string's shape so there's one strptime
+    attempt instead of a try/except per candidate format.
+    """
+    s = expiry_str.strip()
+    if s[:4].isdigit():
+        fmt = "%Y-%m-%d"
+    elif any(c.isalpha() for c in s):
+        fmt = "%d-%b-%Y"
+    elif "/" in s:
+        fmt = "%d/%m/%Y"
+    else:
+        fmt = "%d-%m-%Y"
+    try:
+        return datetime.strptime(s, fmt)
+    except ValueError:
+        return None
+
+# CUSTOM_EXPIRY parsed once here rather than on every get_next_expiry() call
+CUSTOM_EXPIRY_DATE = parse_custom_expiry(CUSTOM_EXPIRY) if CUSTOM_EXPIRY else None
 
 # Expiry cache — avoids repeated API calls within the same day
 _expiry_cache = {"date": None, "expiry": None}
@@ -306,6 +527,7 @@ def get_next_expiry(from_date: datetime = None) -> datetime:
     """Get the next weekly expiry date — AUTO-DETECTED from Breeze API.
     
     Priority:
+    0. CUSTOM_EXPIRY override (until that date has passed)
     1. Cached expiry (if same day)
     2. Breeze API — fetch Nifty futures/option chain to discover real expiry
     3. Fallback — calculated Thursday (handles normal weeks)
@@ -320,6 +542,9 @@ def get_next_expiry(from_date: datetime = None) -> datetime:
     if hasattr(from_date, 'tzinfo') and from_date.tzinfo is not None:
         from_date = from_date.replace(tzinfo=None)
     
+    if CUSTOM_EXPIRY_DATE and CUSTOM_EXPIRY_DATE.date() >= from_date.date():
+        return CUSTOM_EXPIRY_DATE
+    
     today_str = from_date.strftime("%Y-%m-%d")
     
     # Return cached if same day
@@ -421,7 +646,7 @@ def _fetch_expiry_from_api(from_date: datetime) -> datetime:
         spot = 25500  # fallback
         if spot_data and spot_data.get('Success') and spot_data['Success']:
             spot = float(spot_data['Success'][0].get('ltp', 25500))
-        atm = round(spot / 50) * 50
+        atm = atm_strike(spot)
         
         for candidate in unique_candidates[:6]:  # Check max 6 candidates
             try:
@@ -467,6 +692,9 @@ def _calculate_next_thursday(from_date: datetime) -> datetime:
     next_thursday = from_date + timedelta(days=days_ahead)
     return next_thursday.replace(hour=0, minute=0, second=0, microsecond=0)
 
+# Only a couple of expiries are live at once, but every leg quote, order and
+# status build formats them; memoize so strftime runs once per expiry
+@lru_cache(maxsize=64)
 def format_expiry_for_breeze(expiry_date: datetime) -> str:
     """Format expiry date for Breeze API
     
@@ -476,14 +704,27 @@ def format_expiry_for_breeze(expiry_date: datetime) -> str:
     # Primary format: ISO with time
     return expiry_date.strftime("%Y-%m-%dT07:00:00.000Z")
 
+@lru_cache(maxsize=64)
 def format_expiry_breeze_alt(expiry_date: datetime) -> str:
     """Alternative format: DD-Mon-YYYY"""
     return expiry_date.strftime("%d-%b-%Y")
 
+@lru_cache(maxsize=64)
 def format_expiry_display(expiry_date: datetime) -> str:
     """Format expiry date for display: DD-Mon-YYYY"""
     return expiry_date.strftime("%d-%b-%Y")
 
+@lru_cache(maxsize=64)
+def format_iso_date(day: datetime) -> str:
+    """Format a date as YYYY-MM-DD (backtest trade/expiry dates repeat across trades)"""
+    return day.strftime("%Y-%m-%d")
+
+@lru_cache(maxsize=64)
+def format_session_range(trade_date: datetime) -> tuple:
+    """Breeze from/to timestamps covering one trading session (09:15-15:30)"""
+    return (trade_date.strftime("%Y-%m-%dT09:15:00.000Z"),
+            trade_date.strftime("%Y-%m-%dT15:30:00.000Z"))
+
 # ============================================
 # TELEGRAM
 # ============================================
@@ -493,66 +734,249 @@ class Telegram:
         self.chat_id = TELEGRAM_CHAT_ID
         self.enabled = bool(self.token and self.chat_id and self.token != "YOUR_BOT_TOKEN_HERE")
         self.last_update_id = 0
+        self.long_poll_timeout = 30  # Seconds Telegram holds getUpdates open
+        self.commands = queue.Queue()  # Command texts delivered by the poller thread
+        self._poller_started = False
+        self._session = None
+    
+    def _http(self):
+        """Pooled keep-alive session shared by alerts and the long-poll loop"""
+        if self._session is None:
+            import requests
+            from requests.adapters import HTTPAdapter
+            from urllib3.util.retry import Retry
+            session = requests.Session()
+            session.mount("https://", HTTPAdapter(pool_connections=1, pool_maxsize=8,
+                                                  max_retries=Retry(total=2, backoff_factor=0.2)))
+            self._session = session
+        return self._session
         
     def send(self, message):
         if not self.enabled:
             return
         try:
-            import requests
             url = f"https://api.telegram.org/bot{self.token}/sendMessage"
-            requests.post(url, json={"chat_id": self.chat_id, "text": message, "parse_mode": "HTML"}, timeout=10)
+            self._http().post(url, json={"chat_id": self.chat_id, "text": message, "parse_mode": "HTML"}, timeout=10)
         except Exception as e:
             logger.error(f"Telegram error: {e}")
     
+    def start_polling(self):
+        """Start the background long-poll thread (once)"""
+        if not self.enabled or self._poller_started:
+            return
+        self._poller_started = True
+        threading.Thread(target=self._poll_loop, daemon=True).start()
+        logger.info("📱 Telegram long-poll started")
+    
+    def _poll_loop(self):
+        """Hold one getUpdates request open at a time and queue incoming commands"""
+        url = f"https://api.telegram.org/bot{self.token}/getUpdates"
+        failures = 0
+        while True:
+            try:
+                # Same keep-alive pool as send(): back-to-back polls reuse one connection
+                response = self._http().get(
+                    url,
+                    params={"offset": self.last_update_id + 1, "timeout": self.long_poll_timeout},
+                    timeout=self.long_poll_timeout + 5
+                )
+                payload = response.json() if response.content else {}
+                if not response.ok or not payload.get("ok"):
+                    # 409 (another poller/webhook) or 401 (revoked token) return at once -
+                    # back off exponentially instead of re-polling in a tight loop
+                    failures += 1
+                    delay = min(5 * 2 ** (failures - 1), 300)
+                    logger.warning(f"⚠️ Telegram getUpdates failed ({response.status_code}: "
+                                   f"{payload.get('description', 'no description')}) - retrying in {delay}s")
+                    time.sleep(delay)
+                    continue
+                failures = 0
+                for update in payload.get("result", []):
+                    self.last_update_id = update["update_id"]
+                    text = update.get("message", {}).get("text", "")
+                    if text:
+                        self.commands.put(text)
+                        bot_wakeup.set()
+            except Exception as e:
+                logger.debug(f"Telegram poll error: {e}")
+                time.sleep(5)
+    
     def check_commands(self):
+        """Handle all commands queued since the last tick (non-blocking).
+        
+        The batch shares one load_data() and at most one save_data().
+        """
         if not self.enabled:
             return
-        try:
-            import requests
-            url = f"https://api.telegram.org/bot{self.token}/getUpdates"
-            response = requests.get(url, params={"offset": self.last_update_id + 1, "timeout": 1}, timeout=5)
-            updates = response.json().get("result", [])
+        data = None
+        dirty = False
+        while True:
+            try:
+                text = self.commands.get_nowait()
+            except queue.Empty:
+                break
+            if data is None:
+                data = load_data()
+            try:
+                dirty |= bool(self.handle_command(text, data))
+            except Exception as e:
+                logger.debug(f"Telegram command error: {e}")
+        if dirty:
+            save_data(data)
+    
+    def handle_command(self, text, data):
+        """Apply one command to `data`; returns True if it changed bot state"""
+        if text.startswith("/session "):
+            token = text.replace("/session ", "").strip()
+            if token:
+                data["session_token"] = token
+                self.send("✅ Session token updated!")
+                logger.info("Session updated via Telegram")
+                return True
+        
+        elif text == "/status":
+            status = "🟢 Running" if data.get("bot_running") else "⏸️ Stopped"
+            self.send(f"📊 Status: {status}\nStrategy: {data.get('strategy')}\nP&L: ₹{data.get('daily_pnl', 0):,.0f}")
+        
+        elif text == "/start":
+            data["bot_running"] = True
+            self.send("▶️ Bot started!")
+            return True
+        
+        elif text == "/stop":
+            data["bot_running"] = False
+            self.send("⏹️ Bot stopped!")
+            return True
+        
+        elif text == "/backtest":
+            self.send("🔬 Starting backtest... Check dashboard for results.")
             
-            for update in updates:
-                self.last_update_id = update["update_id"]
-                text = update.get("message", {}).get("text", "")
-                
-                if text.startswith("/session "):
-                    token = text.replace("/session ", "").strip()
-                    if token:
-                        data = load_data()
-                        data["session_token"] = token
-                        save_data(data)
-                        self.send("✅ Session token updated!")
-                        logger.info("Session updated via Telegram")
-                
-                elif text == "/status":
-                    data = load_data()
-                    status = "🟢 Running" if data.get("bot_running") else "⏸️ Stopped"
-                    self.send(f"📊 Status: {status}\nStrategy: {data.get('strategy')}\nP&L: ₹{data.get('daily_pnl', 0):,.0f}")
-                
-                elif text == "/start":
-                    data = load_data()
-                    data["bot_running"] = True
-                    save_data(data)
-                    self.send("▶️ Bot started!")
-                
-                elif text == "/stop":
-                    data = load_data()
-                    data["bot_running"] = False
-                    save_data(data)
-                    self.send("⏹️ Bot stopped!")
-                
-                elif text == "/backtest":
-                    self.send("🔬 Starting backtest... Check dashboard for results.")
-                    
-                elif text == "/help":
-                    self.send("🤖 Commands:\n/session TOKEN\n/status\n/start\n/stop\n/backtest\n/help")
-        except:
-            pass
+        elif text == "/help":
+            self.send("🤖 Commands:\n/session TOKEN\n/status\n/start\n/stop\n/backtest\n/help")
+        return False
 
 telegram = Telegram()
 
+# ============================================
+# ENTRY GUARD (cross-replica, Redis sorted set)
+# ============================================
+REDIS_AVAILABLE = False
+try:
+    import redis
+    REDIS_AVAILABLE = True
+except:
+    if REDIS_URL:
+        logger.warning("redis not available - entry guard disabled")
+
+class EntryGuard:
+    """Distributed guard so only one replica holds a given strategy position.
+    
+    Each strategy uses a sorted set of holder tokens scored by last refresh time.
+    Acquire atomically prunes stale holders (older than ENTRY_LOCK_TTL) and adds
+    ours only if the set is empty. Holders refresh every tick and release on exit.
+    Without REDIS_URL every acquire succeeds (single-instance behaviour).
+    """
+    _ACQUIRE_LUA = """
+    redis.call('ZREMRANGEBYSCORE', KEYS[1], '-inf', tonumber(ARGV[1]) - tonumber(ARGV[2]))
+    if redis.call('ZCARD', KEYS[1]) >= 1 then
+        return 0
+    end
+    redis.call('ZADD', KEYS[1], ARGV[1], ARGV[3])
+    redis.call('EXPIRE', KEYS[1], ARGV[2])
+    return 1
+    """
+    # Bump our token; if it was pruned (bot stall, Redis restart) re-add it as long as
+    # nobody else took the slot meanwhile. Returns 0 only when another holder has it.
+    _REFRESH_LUA = """
+    redis.call('ZREMRANGEBYSCORE', KEYS[1], '-inf', tonumber(ARGV[1]) - tonumber(ARGV[2]))
+    if redis.call('ZSCORE', KEYS[1], ARGV[3]) or redis.call('ZCARD', KEYS[1]) == 0 then
+        redis.call('ZADD', KEYS[1], ARGV[1], ARGV[3])
+        redis.call('EXPIRE', KEYS[1], ARGV[2])
+        return 1
+    end
+    return 0
+    """
+    
+    def __init__(self):
+        self.client = None
+        self._acquire_script = None
+        self._refresh_script = None
+        if REDIS_URL and REDIS_AVAILABLE:
+            try:
+                self.client = redis.Redis.from_url(REDIS_URL, socket_timeout=5)
+                self._acquire_script = self.client.register_script(self._ACQUIRE_LUA)
+                self._refresh_script = self.client.register_script(self._REFRESH_LUA)
+                logger.info("🔒 Entry guard using Redis")
+            except Exception as e:
+                logger.error(f"Entry guard Redis setup failed: {e}")
+                self.client = None
+    
+    def acquire(self, name):
+        """Return a holder token, or None if another replica holds the position"""
+        token = uuid.uuid4().hex
+        if not self.client:
+            return token
+        try:
+            if self._acquire_script(keys=[f"{name}_active"], args=[time.time(), ENTRY_LOCK_TTL, token]):
+                return token
+            return None
+        except Exception as e:
+            # Fail open so a Redis outage doesn't stop single-instance trading
+            logger.warning(f"Entry guard unavailable ({e}) - proceeding without lock")
+            return token
+    
+    def refresh(self, name, token):
+        """Keep an open position's token from being pruned as stale"""
+        if not self.client or not token:
+            return
+        try:
+            if not self._refresh_script(keys=[f"{name}_active"], args=[time.time(), ENTRY_LOCK_TTL, token]):
+                logger.warning(f"🔒 Entry guard for {name} lapsed and another instance now holds it")
+        except Exception as e:
+            logger.debug(f"Entry guard refresh error: {e}")
+    
+    def release(self, name, token):
+        if not self.client or not token:
+            return
+        try:
+            self.client.zrem(f"{name}_active", token)
+        except Exception as e:
+            logger.debug(f"Entry guard release error: {e}")
+
+entry_guard = EntryGuard()
+
+# ============================================
+# LIVE P&L FEED (bot loop -> dashboard stream)
+# ============================================
+class LiveFeed:
+    """Latest per-strategy P&L computed by the bot loop.
+    
+    check_exit publishes every tick, so the SSE stream can push fresh P&L the
+    moment it's known instead of polling the broker from the web thread.
+    """
+    
+    def __init__(self):
+        self._cond = threading.Condition()
+        self.version = 0
+        self.pnl = {"iron_condor": None, "daily_scalp": None}
+    
+    def publish(self, strategy, pnl_data):
+        with self._cond:
+            self.pnl[strategy] = pnl_data
+            self.version += 1
+            self._cond.notify_all()
+    
+    def snapshot(self):
+        with self._cond:
+            return self.version, dict(self.pnl)
+    
+    def wait(self, version, timeout):
+        """Block until something newer than `version` is published (or timeout)"""
+        with self._cond:
+            self._cond.wait_for(lambda: self.version != version, timeout)
+
+live_feed = LiveFeed()
+
 # ============================================
 # BREEZE API
 # ============================================
@@ -567,58 +991,67 @@ class BreezeAPI:
     def __init__(self):
         self.breeze = None
         self.connected = False
-        self.last_call_time = 0
-        self.min_call_interval = 0.5  # Minimum 500ms between API calls
         self.ltp_cache = {}  # Cache for LTP values
         self.cache_ttl = 5  # Cache TTL in seconds
-        self.calls_per_minute = 0
-        self.last_minute_reset = time.time()
+        self._chain_misses = {}  # expiry -> monotonic time of the last empty/failed chain fetch
+        self.chain_miss_ttl = 60  # Skip re-asking a dead chain for about one bot cycle
         self.max_calls_per_minute = 45  # Stay well under limit
+        self._tokens = float(self.max_calls_per_minute)  # Token bucket: calls available right now
+        self._last_refill = time.monotonic()
+        self._bucket_lock = threading.Lock()  # Leg fetches can run on several threads
+        self._vix_cache = (float("-inf"), None)  # (monotonic fetch time, VIX value)
+        self.vix_cache_ttl = 60  # VIX moves slowly; one quote serves a whole bot cycle
+        self._vix_codes = ["INDVIX", "NIFVIX"]  # Stock codes to try; the one that works moves first
+        self._quote_kwargs_cache = {}  # (strike, right, expiry) -> get_quotes kwargs
+    
+    def _refill(self):
+        """Top the bucket up at max_calls_per_minute per 60s, capped at one minute's budget"""
+        now = time.monotonic()
+        rate = self.max_calls_per_minute / 60
+        self._tokens = min(float(self.max_calls_per_minute), self._tokens + (now - self._last_refill) * rate)
+        self._last_refill = now
+        return rate
     
     def _rate_limit(self):
-        """Enforce rate limiting between API calls"""
-        current_time = time.time()
-        
-        # Reset minute counter
-        if current_time - self.last_minute_reset >= 60:
-            self.calls_per_minute = 0
-            self.last_minute_reset = current_time
-        
-        # Check if we're approaching the limit
-        if self.calls_per_minute >= self.max_calls_per_minute:
-            wait_time = 60 - (current_time - self.last_minute_reset)
-            if wait_time > 0:
-                logger.warning(f"⏳ Rate limit approaching ({self.calls_per_minute} calls), waiting {wait_time:.0f}s...")
-                time.sleep(wait_time + 2)
-                self.calls_per_minute = 0
-                self.last_minute_reset = time.time()
-        
-        # Ensure minimum interval between calls
-        elapsed = current_time - self.last_call_time
-        if elapsed < self.min_call_interval:
-            time.sleep(self.min_call_interval - elapsed)
-        
-        self.last_call_time = time.time()
-        self.calls_per_minute += 1
+        """Take one token per API call, sleeping only when the bucket is empty.
+        
+        A burst (e.g. the four IC legs) goes out back to back; sustained use is
+        still held to max_calls_per_minute.
+        """
+        with self._bucket_lock:
+            rate = self._refill()
+            if self._tokens < 1:
+                wait_time = (1 - self._tokens) / rate
+                logger.debug(f"⏳ API call budget used up, waiting {wait_time:.1f}s...")
+                time.sleep(wait_time)
+                self._refill()
+            self._tokens -= 1
     
     def _get_cache_key(self, strike, option_type, expiry):
-        """Generate cache key for LTP"""
-        exp_str = expiry.strftime('%Y-%m-%d') if isinstance(expiry, datetime) else str(expiry)[:10]
-        return f"{strike}_{option_type}_{exp_str}"
+        """Packed int LTP key: strike << 24 | put bit << 20 | expiry day ordinal.
+        
+        Built with integer math only; the old f-string key re-ran strftime on
+        every cache lookup.
+        """
+        if isinstance(expiry, datetime):
+            day = expiry.toordinal()
+        else:
+            try:
+                day = date.fromisoformat(str(expiry)[:10]).toordinal()
+            except ValueError:
+                return (strike, option_type, str(expiry))
+        return (int(strike) << 24) | ((option_type[:1] in ("p", "P")) << 20) | day
     
     def _get_cached_ltp(self, strike, option_type, expiry):
         """Get LTP from cache if valid"""
-        key = self._get_cache_key(strike, option_type, expiry)
-        if key in self.ltp_cache:
-            cached_time, cached_value = self.ltp_cache[key]
-            if time.time() - cached_time < self.cache_ttl:
-                return cached_value
+        entry = self.ltp_cache.get(self._get_cache_key(strike, option_type, expiry))
+        if entry is not None and time.monotonic() - entry[0] < self.cache_ttl:
+            return entry[1]
         return None
     
     def _set_cached_ltp(self, strike, option_type, expiry, value):
         """Set LTP in cache"""
-        key = self._get_cache_key(strike, option_type, expiry)
-        self.ltp_cache[key] = (time.time(), value)
+        self.ltp_cache[self._get_cache_key(strike, option_type, expiry)] = (time.monotonic(), value)
         
     def connect(self):
         if not BREEZE_AVAILABLE:
@@ -636,6 +1069,7 @@ class BreezeAPI:
             self.breeze = BreezeConnect(api_key=API_KEY)
             self.breeze.generate_session(api_secret=API_SECRET, session_token=session)
             self.connected = True
+            self._quote_kwargs_cache.clear()  # New session each day; drop old expiries' legs
             logger.info("✅ Connected to Breeze API")
             telegram.send("✅ Connected to Breeze API")
             return True
@@ -655,7 +1089,6 @@ class BreezeAPI:
             if data and data.get('Status') == 5:
                 logger.warning("⚠️ Rate limit hit on get_spot, waiting 60s...")
                 time.sleep(60)
-                self.calls_per_minute = 0
                 return None
             
             if data and 'Success' in data and data['Success']:
@@ -664,17 +1097,16 @@ class BreezeAPI:
             logger.debug(f"Spot error: {e}")
         return None
     
-    def get_ltp(self, strike, option_type, expiry):
-        """Get LTP for an option with caching and rate limiting"""
-        if not self.connected:
-            return None
+    def _quote_kwargs(self, strike, option_type, expiry):
+        """get_quotes arguments for one leg, one dict per expiry format to try.
         
-        # Check cache first
-        cached = self._get_cached_ltp(strike, option_type, expiry)
+        The same handful of legs is quoted every tick, so the expiry strings
+        and kwargs are built once per (strike, right, expiry) and reused.
+        """
+        key = (strike, option_type, expiry)
+        cached = self._quote_kwargs_cache.get(key)
         if cached is not None:
-            logger.debug(f"📦 Cache hit: {strike}{option_type.upper()} = {cached}")
             return cached
-        
         # Try multiple expiry formats
         expiry_formats = []
         if isinstance(expiry, datetime):
@@ -684,32 +1116,45 @@ class BreezeAPI:
             ]
         elif isinstance(expiry, str):
             expiry_formats = [expiry]
+        cached = tuple({
+            "stock_code": "NIFTY",
+            "exchange_code": "NFO",
+            "expiry_date": exp_fmt,
+            "product_type": "options",
+            "right": option_type.lower(),
+            "strike_price": str(strike)
+        } for exp_fmt in expiry_formats)
+        self._quote_kwargs_cache[key] = cached
+        return cached
+    
+    def get_ltp(self, strike, option_type, expiry):
+        """Get LTP for an option with caching and rate limiting"""
+        if not self.connected:
+            return None
+        
+        # Check cache first
+        cached = self._get_cached_ltp(strike, option_type, expiry)
+        if cached is not None:
+            logger.debug("📦 Cache hit: %s %s = %s", strike, option_type, cached)
+            return cached
         
-        for exp_fmt in expiry_formats:
+        for quote_kwargs in self._quote_kwargs(strike, option_type, expiry):
             try:
                 self._rate_limit()
                 
-                data = self.breeze.get_quotes(
-                    stock_code="NIFTY", 
-                    exchange_code="NFO", 
-                    expiry_date=exp_fmt,
-                    product_type="options", 
-                    right=option_type.lower(), 
-                    strike_price=str(strike)
-                )
+                data = self.breeze.get_quotes(**quote_kwargs)
                 
                 # Check for rate limit error
                 if data and data.get('Status') == 5:
                     logger.warning(f"⚠️ Rate limit hit, waiting 60s...")
                     time.sleep(60)
-                    self.calls_per_minute = 0
                     continue
                 
                 # Check for success
                 if data and data.get('Success'):
                     ltp = float(data['Success'][0]['ltp'])
                     if ltp > 0:
-                        logger.debug(f"✅ Got LTP {ltp} for {strike}{option_type.upper()}")
+                        logger.debug("✅ Got LTP %s for %s %s", ltp, strike, option_type)
                         self._set_cached_ltp(strike, option_type, expiry, ltp)
                         return ltp
                 
@@ -718,7 +1163,6 @@ class BreezeAPI:
                     if 'Limit exceed' in str(data.get('Error', '')):
                         logger.warning(f"⚠️ Rate limit in response, waiting 60s...")
                         time.sleep(60)
-                        self.calls_per_minute = 0
                     else:
                         logger.debug(f"API Error for {strike}{option_type.upper()}: {data.get('Error')}")
                     
@@ -738,6 +1182,37 @@ class BreezeAPI:
                 time.sleep(3)  # Wait 3 seconds before retry
         return None
     
+    def get_ltps(self, legs, expiry):
+        """get_ltp for every (strike, right) in `legs`, in `legs` order.
+        
+        Legs already in the LTP cache are served inline; otherwise the quotes
+        go out on parallel threads (paced by the token bucket) so one slow
+        leg doesn't serialize the rest.
+        """
+        if not legs:
+            return []
+        if not self.connected:
+            return [None] * len(legs)
+        cached = [self._get_cached_ltp(strike, right, expiry) for strike, right in legs]
+        if None not in cached:
+            return cached
+        with ThreadPoolExecutor(max_workers=min(len(legs), LEG_FETCH_WORKERS)) as pool:
+            futures = [pool.submit(self.get_ltp, strike, right, expiry) for strike, right in legs]
+            return [f.result() for f in futures]
+    
+    def get_ltps_with_retry(self, legs, expiry):
+        """get_ltp_with_retry for every (strike, right) in `legs` at once.
+        
+        Legs are fetched on parallel threads so their round trips and retry
+        waits overlap; the token bucket still paces the actual calls.
+        Returns prices in `legs` order (None where a leg couldn't be priced).
+        """
+        if not legs:
+            return []
+        with ThreadPoolExecutor(max_workers=min(len(legs), LEG_FETCH_WORKERS)) as pool:
+            futures = [pool.submit(self.get_ltp_with_retry, strike, right, expiry) for strike, right in legs]
+            return [f.result() for f in futures]
+    
     def get_historical_data(self, strike, option_type, expiry, from_date, to_date, interval="1day"):
         """Get historical OHLC data for backtesting"""
         if not self.connected:
@@ -767,29 +1242,72 @@ class BreezeAPI:
             logger.debug(f"Historical data error: {e}")
         return None
     
-    def get_option_chain(self, expiry):
-        """Get option chain for a given expiry"""
+    def get_option_chain(self, expiry, rights=("call", "put")):
+        """Get option chain for a given expiry.
+        
+        Breeze's chain endpoint wants a `right`, so each requested side is
+        its own (rate-limited) call; the rows are returned together.
+        """
         if not self.connected:
             return None
-        try:
-            if isinstance(expiry, datetime):
-                expiry = format_expiry_for_breeze(expiry)
-                
-            data = self.breeze.get_option_chain_quotes(
-                stock_code="NIFTY",
-                exchange_code="NFO",
-                product_type="options",
-                expiry_date=expiry
-            )
-            if data and 'Success' in data:
-                return data['Success']
-        except Exception as e:
-            logger.debug(f"Option chain error: {e}")
-        return None
+        if isinstance(expiry, datetime):
+            expiry = format_expiry_for_breeze(expiry)
+        rows = []
+        for right in rights:
+            try:
+                self._rate_limit()
+                data = self.breeze.get_option_chain_quotes(
+                    stock_code="NIFTY",
+                    exchange_code="NFO",
+                    product_type="options",
+                    expiry_date=expiry,
+                    right=right
+                )
+                if data and data.get('Success'):
+                    for row in data['Success']:
+                        row.setdefault('right', right)
+                        rows.append(row)
+            except Exception as e:
+                logger.debug(f"Option chain error ({right}): {e}")
+        return rows or None
+    
+    def fetch_and_cache_chain(self, expiry, rights=("call", "put")):
+        """Fetch the option chain once and seed ltp_cache for every strike/right in it"""
+        chain = self.get_option_chain(expiry, rights)
+        for row in chain or []:
+            try:
+                ltp = float(row.get('ltp', 0))
+                if ltp > 0:
+                    self._set_cached_ltp(int(float(row.get('strike_price', 0))), row.get('right', '').lower(), expiry, ltp)
+            except (TypeError, ValueError):
+                continue
+        return chain
+    
+    def prefetch_legs(self, legs, expiry):
+        """Refresh all of `legs` [(strike, right), ...] with one chain call per side when any is stale.
+        
+        The following get_ltp calls then hit the cache instead of spending a
+        rate-limited get_quotes per leg; legs missing from the chain still
+        fall back to their own quote. A chain that came back empty isn't asked
+        for again until chain_miss_ttl has passed, so a dead endpoint doesn't
+        cost tokens on every P&L/exit tick.
+        """
+        if not self.connected or all(self._get_cached_ltp(strike, right, expiry) is not None for strike, right in legs):
+            return
+        missed_at = self._chain_misses.get(expiry)
+        if missed_at is not None and time.monotonic() - missed_at < self.chain_miss_ttl:
+            return
+        rights = tuple(sorted({right for _, right in legs}))
+        if self.fetch_and_cache_chain(expiry, rights):
+            self._chain_misses.pop(expiry, None)
+        else:
+            self._chain_misses[expiry] = time.monotonic()
     
     def place_order(self, strike, option_type, expiry, quantity, side, price):
         if not self.connected:
             return None
+        # Our own fill moves this leg: the next read (e.g. the post-exit P&L) must quote afresh
+        self.ltp_cache.pop(self._get_cache_key(strike, option_type, expiry), None)
         try:
             if isinstance(expiry, datetime):
                 expiry = format_expiry_for_breeze(expiry)
@@ -820,29 +1338,41 @@ class BreezeAPI:
         return format_expiry_for_breeze(get_next_expiry())
     
     def get_vix(self):
-        """Get India VIX value via Nifty VIX quote"""
+        """Get India VIX value via Nifty VIX quote (cached for vix_cache_ttl seconds)"""
         if not self.connected:
             return None
-        try:
-            self._rate_limit()
-            # India VIX stock code is INDIA VIX / NIFVIX on NSE
-            data = self.breeze.get_quotes(stock_code="INDVIX", exchange_code="NSE", product_type="cash")
-            if data and data.get('Success') and data['Success']:
-                return float(data['Success'][0].get('ltp', 0))
-        except:
-            pass
-        
-        # Fallback: try via historical data
-        try:
-            self._rate_limit()
-            data = self.breeze.get_quotes(stock_code="NIFVIX", exchange_code="NSE", product_type="cash")
-            if data and data.get('Success') and data['Success']:
-                return float(data['Success'][0].get('ltp', 0))
-        except:
-            pass
+        cached_time, vix = self._vix_cache
+        if time.monotonic() - cached_time < self.vix_cache_ttl:
+            return vix
+        vix = None
+        # India VIX stock code is INDIA VIX / NIFVIX on NSE
+        for code in self._vix_codes:
+            try:
+                self._rate_limit()
+                data = self.breeze.get_quotes(stock_code=code, exchange_code="NSE", product_type="cash")
+                if data and data.get('Success') and data['Success']:
+                    vix = float(data['Success'][0].get('ltp', 0))
+            except:
+                pass
+            if vix is not None:
+                if code != self._vix_codes[0]:
+                    self._vix_codes.remove(code)
+                    self._vix_codes.insert(0, code)
+                break
         
-        logger.debug("Could not fetch India VIX")
-        return None
+        if vix is None:
+            logger.debug("Could not fetch India VIX")
+        self._vix_cache = (time.monotonic(), vix)
+        return vix
+    
+    def get_atm_iv(self):
+        """Get ATM implied volatility estimate (annualized, e.g. 0.14) from India VIX.
+        Goes through get_vix's cache, so it costs no extra call right after a
+        VIX filter check."""
+        vix = self.get_vix()
+        if not vix or vix <= 0:
+            return None
+        return vix / 100
     
     def get_spot_range(self):
         """Get today's Nifty high/low to gauge intraday range"""
@@ -858,14 +1388,84 @@ class BreezeAPI:
             pass
         return None, None
 
+# ============================================
+# OPTION PRICING (pre-entry credit estimate)
+# ============================================
+def _norm_cdf(x: float) -> float:
+    return 0.5 * (1 + math.erf(x / math.sqrt(2)))
+
+def bs_price(spot: float, strike: float, years: float, iv: float, option_type: str) -> float:
+    """Black-Scholes option price (zero rates, no dividends)"""
+    if years <= 0 or iv <= 0:
+        intrinsic = spot - strike if option_type == "call" else strike - spot
+        return max(intrinsic, 0.0)
+    vol_t = iv * math.sqrt(years)
+    d1 = (math.log(spot / strike) + 0.5 * vol_t * vol_t) / vol_t
+    d2 = d1 - vol_t
+    if option_type == "call":
+        return spot * _norm_cdf(d1) - strike * _norm_cdf(d2)
+    return strike * _norm_cdf(-d2) - spot * _norm_cdf(-d1)
+
+def years_to_expiry(expiry) -> Optional[float]:
+    """Time to expiry in years (min half a day), None if expiry isn't a datetime"""
+    if not isinstance(expiry, datetime):
+        return None
+    now = get_ist_now().replace(tzinfo=None)
+    days = (expiry.date() - now.date()).days
+    return max(days, 0.5) / 365
+
+def predicted_credit_too_low(predicted: float, min_required: float) -> bool:
+    """True when the estimated credit is below the minimum even after PREDICTED_CREDIT_MARGIN.
+    
+    The estimate is a heuristic, not a lower bound (flat IV, no skew, coarse time),
+    so a margin trades some skipped-but-valid entries for fewer quote calls.
+    Always False while the margin is 0 (the default).
+    """
+    if PREDICTED_CREDIT_MARGIN <= 0:
+        return False
+    return predicted * (1 + PREDICTED_CREDIT_MARGIN) < min_required
+
 # ============================================
 # BACKTESTING ENGINE
 # ============================================
+# Backtest IV model: 12% base plus a 5%/DTE bump near expiry, tabulated for weekly DTEs
+_IV_BY_DTE = tuple(0.12 + (0.05 * (1 / max(d, 1))) for d in range(15))
+
+def estimated_iv(days_to_expiry: int) -> float:
+    """Estimated IV for a backtest trade `days_to_expiry` (>= 1) days from expiry"""
+    if days_to_expiry < len(_IV_BY_DTE):
+        return _IV_BY_DTE[days_to_expiry]
+    return 0.12 + (0.05 * (1 / days_to_expiry))
+
+@lru_cache(maxsize=256)
+def _estimate_premiums(spot: float, legs: tuple, dte: int, iv: float) -> tuple:
+    """Premium model behind Backtester.estimate_leg_premiums (memoized on exact inputs)
+    
+    In "both" mode Straddle and Daily Scalp price the same ATM legs at the same
+    spot on each day, so every second straddle estimate is a cache hit.
+    """
+    # Base ATM premium (roughly 1.5-2.5% of spot for weekly options), same for every leg
+    atm_premium = spot * iv * math.sqrt(dte / 365) * 0.4
+    itm_time_value = atm_premium * 0.5  # ITM has less time value
+    
+    premiums = []
+    for strike, option_type in legs:
+        # Moneyness: positive = ITM, negative = OTM (callers pass "call"/"put")
+        diff = spot - strike if option_type == "call" else strike - spot
+        if diff > 0:
+            premium = diff + itm_time_value
+        else:
+            # Premium decays with distance from ATM
+            premium = atm_premium * math.exp(diff / spot * 10)
+        premiums.append(max(round(premium, 2), 2.0))
+    return tuple(premiums)
+
 class Backtester:
     def __init__(self, api: BreezeAPI = None):
         self.api = api or BreezeAPI()
         self.results = []
         self.use_historical_api = False  # Set to True to fetch from Breeze API
+        self._premium_cache = {}  # (strike, type, expiry, trade date) -> open premium or None
         
     def get_expiry_dates(self, start_date: datetime, end_date: datetime) -> List[datetime]:
         """Get all weekly expiry dates for backtesting period"""
@@ -879,32 +1479,12 @@ class Backtester:
         Estimate option premium using simplified Black-Scholes approximation
         More realistic than previous formula
         """
-        # Ensure minimum 1 day to expiry
-        dte = max(days_to_expiry, 1)
-        
-        # Calculate moneyness
-        if option_type.lower() == "call":
-            moneyness = (spot - strike) / spot  # Positive = ITM, Negative = OTM
-        else:  # put
-            moneyness = (strike - spot) / spot  # Positive = ITM, Negative = OTM
-        
-        # Time factor (annualized)
-        time_factor = math.sqrt(dte / 365)
-        
-        # Base ATM premium (roughly 1.5-2.5% of spot for weekly options)
-        atm_premium = spot * iv * time_factor * 0.4
-        
-        # Adjust for moneyness
-        if moneyness > 0:  # ITM
-            intrinsic = abs(spot - strike)
-            premium = intrinsic + atm_premium * 0.5  # ITM has less time value
-        else:  # OTM
-            # Premium decays with distance from ATM
-            otm_factor = math.exp(-abs(moneyness) * 10)  # Decay factor
-            premium = atm_premium * otm_factor
-        
-        # Minimum premium
-        return max(round(premium, 2), 2.0)
+        return self.estimate_leg_premiums(spot, [(strike, option_type)], days_to_expiry, iv)[0]
+    
+    def estimate_leg_premiums(self, spot: float, legs: List[tuple], days_to_expiry: int,
+                              iv: float = 0.15) -> List[float]:
+        """Estimate premiums for several (strike, option_type) legs sharing spot/DTE/IV"""
+        return list(_estimate_premiums(spot, tuple(legs), max(days_to_expiry, 1), iv))
     
     def get_historical_premium(self, strike: int, option_type: str, expiry: datetime, 
                                 trade_date: datetime) -> float:
@@ -915,12 +1495,17 @@ class Backtester:
         if not self.api.connected:
             return None
         
+        # Straddle and Scalp share the ATM legs on the same day in "both" mode
+        key = (strike, option_type, expiry.date(), trade_date.date())
+        if key in self._premium_cache:
+            return self._premium_cache[key]
+        
         try:
-            # Format dates for API
-            from_date = trade_date.strftime("%Y-%m-%dT09:15:00.000Z")
-            to_date = trade_date.strftime("%Y-%m-%dT15:30:00.000Z")
+            # Format dates for API (cached: every leg of a trade day shares them)
+            from_date, to_date = format_session_range(trade_date)
             expiry_str = format_expiry_for_breeze(expiry)
             
+            self.api._rate_limit()
             data = self.api.breeze.get_historical_data_v2(
                 interval="1day",
                 from_date=from_date,
@@ -933,19 +1518,33 @@ class Backtester:
                 strike_price=str(strike)
             )
             
+            premium = None
             if data and data.get('Success') and len(data['Success']) > 0:
                 # Return opening price as entry premium
-                return float(data['Success'][0].get('open', 0))
+                premium = float(data['Success'][0].get('open', 0))
+            # Cache answered lookups (including "no data"); errors are retried
+            self._premium_cache[key] = premium
+            return premium
         except Exception as e:
             logger.debug(f"Historical data error for {strike}{option_type}: {e}")
         
         return None
     
+    def get_historical_premiums(self, legs: List[tuple], expiry: datetime,
+                                trade_date: datetime) -> List[float]:
+        """get_historical_premium for every (strike, option_type) leg on parallel threads"""
+        if not legs:
+            return []
+        with ThreadPoolExecutor(max_workers=min(len(legs), LEG_FETCH_WORKERS)) as pool:
+            futures = [pool.submit(self.get_historical_premium, strike, right, expiry, trade_date)
+                       for strike, right in legs]
+            return [f.result() for f in futures]
+    
     def simulate_iron_condor(self, spot: float, expiry: datetime, trade_date: datetime,
                              call_sell_dist: int = 150, call_buy_dist: int = 250,
                              put_sell_dist: int = 150, put_buy_dist: int = 250) -> Dict:
         """Simulate Iron Condor trade with realistic premium estimation"""
-        atm = round(spot / 50) * 50
+        atm = atm_strike(spot)
         
         # Strike prices
         sc = atm + call_sell_dist  # Sell Call
@@ -958,10 +1557,8 @@ class Backtester:
         
         # Try to get historical data from API if enabled
         if self.use_historical_api and self.api.connected:
-            sc_premium = self.get_historical_premium(sc, "call", expiry, trade_date)
-            bc_premium = self.get_historical_premium(bc, "call", expiry, trade_date)
-            sp_premium = self.get_historical_premium(sp, "put", expiry, trade_date)
-            bp_premium = self.get_historical_premium(bp, "put", expiry, trade_date)
+            sc_premium, bc_premium, sp_premium, bp_premium = self.get_historical_premiums(
+                [(sc, "call"), (bc, "call"), (sp, "put"), (bp, "put")], expiry, trade_date)
             
             # If all premiums fetched successfully
             if all([sc_premium, bc_premium, sp_premium, bp_premium]):
@@ -974,18 +1571,16 @@ class Backtester:
                     "premiums": {"sc": sc_premium, "bc": bc_premium, "sp": sp_premium, "bp": bp_premium},
                     "credit": round(credit, 2),
                     "max_loss": (bc - sc) - credit,
-                    "expiry": expiry.strftime("%Y-%m-%d"),
+                    "expiry": format_iso_date(expiry),
                     "days_to_expiry": days_to_expiry,
                     "data_source": "API"
                 }
         
         # Use estimation if API not available
-        iv = 0.12 + (0.05 * (1 / days_to_expiry))  # IV increases closer to expiry
+        iv = estimated_iv(days_to_expiry)  # IV increases closer to expiry
         
-        sc_premium = self.estimate_option_premium(spot, sc, days_to_expiry, "call", iv)
-        bc_premium = self.estimate_option_premium(spot, bc, days_to_expiry, "call", iv)
-        sp_premium = self.estimate_option_premium(spot, sp, days_to_expiry, "put", iv)
-        bp_premium = self.estimate_option_premium(spot, bp, days_to_expiry, "put", iv)
+        sc_premium, bc_premium, sp_premium, bp_premium = self.estimate_leg_premiums(
+            spot, [(sc, "call"), (bc, "call"), (sp, "put"), (bp, "put")], days_to_expiry, iv)
         
         credit = (sc_premium - bc_premium) + (sp_premium - bp_premium)
         max_loss = (bc - sc) - credit
@@ -995,24 +1590,24 @@ class Backtester:
             "spot": round(spot, 2),
             "atm": atm,
             "strikes": {"sc": sc, "bc": bc, "sp": sp, "bp": bp},
-            "premiums": {"sc": round(sc_premium, 2), "bc": round(bc_premium, 2), 
-                        "sp": round(sp_premium, 2), "bp": round(bp_premium, 2)},
+            # Estimated premiums are already rounded to paise
+            "premiums": {"sc": sc_premium, "bc": bc_premium, "sp": sp_premium, "bp": bp_premium},
             "credit": round(credit, 2),
             "max_loss": round(max_loss, 2),
-            "expiry": expiry.strftime("%Y-%m-%d"),
+            "expiry": format_iso_date(expiry),
             "days_to_expiry": days_to_expiry,
             "data_source": "ESTIMATED"
         }
     
     def simulate_straddle(self, spot: float, expiry: datetime, trade_date: datetime) -> Dict:
         """Simulate Short Straddle trade with realistic premium estimation"""
-        atm = round(spot / 50) * 50
+        atm = atm_strike(spot)
         days_to_expiry = max((expiry - trade_date).days, 1)
         
         # Try to get historical data from API if enabled
         if self.use_historical_api and self.api.connected:
-            ce_premium = self.get_historical_premium(atm, "call", expiry, trade_date)
-            pe_premium = self.get_historical_premium(atm, "put", expiry, trade_date)
+            ce_premium, pe_premium = self.get_historical_premiums(
+                [(atm, "call"), (atm, "put")], expiry, trade_date)
             
             if ce_premium and pe_premium:
                 return {
@@ -1022,16 +1617,16 @@ class Backtester:
                     "ce_premium": ce_premium,
                     "pe_premium": pe_premium,
                     "total_premium": round(ce_premium + pe_premium, 2),
-                    "expiry": expiry.strftime("%Y-%m-%d"),
+                    "expiry": format_iso_date(expiry),
                     "days_to_expiry": days_to_expiry,
                     "data_source": "API"
                 }
         
         # Use estimation - ATM options have highest time value
-        iv = 0.12 + (0.05 * (1 / days_to_expiry))
+        iv = estimated_iv(days_to_expiry)
         
-        ce_premium = self.estimate_option_premium(spot, atm, days_to_expiry, "call", iv)
-        pe_premium = self.estimate_option_premium(spot, atm, days_to_expiry, "put", iv)
+        ce_premium, pe_premium = self.estimate_leg_premiums(
+            spot, [(atm, "call"), (atm, "put")], days_to_expiry, iv)
         
         # ATM options are roughly equal, slight adjustment for put-call parity
         total_premium = ce_premium + pe_premium
@@ -1040,10 +1635,10 @@ class Backtester:
             "strategy": "SHORT_STRADDLE",
             "spot": round(spot, 2),
             "strike": atm,
-            "ce_premium": round(ce_premium, 2),
-            "pe_premium": round(pe_premium, 2),
+            "ce_premium": ce_premium,  # Already rounded to paise by the estimator
+            "pe_premium": pe_premium,
             "total_premium": round(total_premium, 2),
-            "expiry": expiry.strftime("%Y-%m-%d"),
+            "expiry": format_iso_date(expiry),
             "days_to_expiry": days_to_expiry,
             "data_source": "ESTIMATED"
         }
@@ -1054,54 +1649,41 @@ class Backtester:
         Simulate intraday price movement and determine exit
         Returns: exit_time, exit_reason, pnl_percent
         """
-        # Parse times
         entry_hour, entry_min = map(int, entry_time.split(':'))
         exit_hour, exit_min = map(int, exit_time.split(':'))
+        exit_mins, exit_reason, pnl_percent = self.simulate_exit_minutes(
+            target_pct, sl_pct, entry_hour * 60 + entry_min, exit_hour * 60 + exit_min)
+        return {
+            "exit_time": exit_time if exit_reason == "TIME_EXIT" else f"{exit_mins // 60:02d}:{exit_mins % 60:02d}",
+            "exit_reason": exit_reason,
+            "pnl_percent": pnl_percent
+        }
+    
+    def simulate_exit_minutes(self, target_pct: float, sl_pct: float,
+                              entry_mins: int, exit_mins: int) -> tuple:
+        """simulate_intraday_exit on minutes since midnight, without parsing or formatting
         
-        # Simulate price checking every 15 minutes
-        current_hour = entry_hour
-        current_min = entry_min
-        
+        Returns (exit minute, exit reason, pnl percent); run_backtest calls this
+        directly since it already holds its entry/exit times as minutes.
+        """
         # Track cumulative premium change (negative = profit for short positions)
         premium_change_pct = 0
+        rand = random.random
         
-        while True:
-            # Move forward 15 minutes
-            current_min += 15
-            if current_min >= 60:
-                current_min -= 60
-                current_hour += 1
-            
-            # Check if we've reached exit time
-            current_time_mins = current_hour * 60 + current_min
-            exit_time_mins = exit_hour * 60 + exit_min
-            
-            if current_time_mins >= exit_time_mins:
-                return {
-                    "exit_time": exit_time,
-                    "exit_reason": "TIME_EXIT",
-                    "pnl_percent": premium_change_pct
-                }
-            
+        # Simulate price checking every 15 minutes until the exit time
+        for current_mins in range(entry_mins + 15, exit_mins, 15):
             # Simulate random price movement (-5% to +5% per interval)
-            move = (random.random() - 0.5) * 10  # Random move
-            premium_change_pct += move
+            premium_change_pct += (rand() - 0.5) * 10
             
             # Check target (premium decreased by target_pct)
             if premium_change_pct <= -target_pct:
-                return {
-                    "exit_time": f"{current_hour:02d}:{current_min:02d}",
-                    "exit_reason": "TARGET",
-                    "pnl_percent": target_pct  # Lock in target
-                }
+                return current_mins, "TARGET", target_pct  # Lock in target
             
             # Check stop loss (premium increased by sl_pct)
             if premium_change_pct >= sl_pct:
-                return {
-                    "exit_time": f"{current_hour:02d}:{current_min:02d}",
-                    "exit_reason": "STOP_LOSS",
-                    "pnl_percent": -sl_pct  # Lock in loss
-                }
+                return current_mins, "STOP_LOSS", -sl_pct  # Lock in loss
+        
+        return exit_mins, "TIME_EXIT", premium_change_pct
     
     def run_backtest(self, start_date: datetime, end_date: datetime, 
                      strategy: str = "iron_condor", initial_capital: float = 500000,
@@ -1143,6 +1725,34 @@ class Backtester:
         api_data_count = 0
         estimated_data_count = 0
         
+        # Loop invariants: parse the entry/exit times once instead of on every trading day
+        to_minutes = lambda hhmm: int(hhmm.split(':')[0]) * 60 + int(hhmm.split(':')[1])
+        entry_base_mins = to_minutes(entry_start)
+        scalp_base_mins = to_minutes(SCALP_ENTRY_TIME)
+        week_offsets = [timedelta(days=i) for i in range(7)]  # Monday + i
+        # random.randint() is several times slower than random.random(); scale floats instead
+        rand = random.random
+        
+        # Per-strategy simulation settings, in the order trades are taken each day:
+        # (simulate, strategy label, premium field, target %, SL %, quantity,
+        #  time-exit P&L bias, time-exit P&L range, exit time, exit minute, scalp entry timing)
+        simulate_ic = lambda spot, expiry, trade_date: self.simulate_iron_condor(
+            spot, expiry, trade_date, IC_CALL_SELL_DISTANCE, IC_CALL_BUY_DISTANCE, IC_PUT_SELL_DISTANCE, IC_PUT_BUY_DISTANCE)
+        active_strategies = []
+        if strategy in ["iron_condor", "both"]:
+            # TIME_EXIT P&L between -36% and +54% of credit
+            active_strategies.append((simulate_ic, None, "credit", IC_TARGET_PERCENT, IC_STOP_LOSS_PERCENT,
+                                      QUANTITY, 0.4, 90, force_exit, to_minutes(force_exit), False))
+        if strategy in ["straddle", "both"]:
+            active_strategies.append((self.simulate_straddle, None, "total_premium", STR_TARGET_PERCENT,
+                                      STR_STOP_LOSS_PERCENT, QUANTITY, 0.4, 50, force_exit, to_minutes(force_exit), False))
+        if strategy in ["daily_scalp", "both"]:
+            # Scalp uses same ATM straddle simulation but with scalp-specific params;
+            # its time exits tend to be smaller (shorter window)
+            active_strategies.append((self.simulate_straddle, "DAILY_SCALP", "total_premium", SCALP_TARGET_PERCENT,
+                                      SCALP_STOP_LOSS_PERCENT, SCALP_QUANTITY, 0.35, 40, SCALP_EXIT_TIME,
+                                      to_minutes(SCALP_EXIT_TIME), True))
+        
         # Get trading days for each expiry week
         for expiry in expiries:
             if expiry < start_date:
@@ -1151,29 +1761,23 @@ class Backtester:
             # Get all trading days for this expiry week (Mon-Thu or Mon-Fri before expiry)
             week_start = expiry - timedelta(days=expiry.weekday())  # Monday of expiry week
             
-            # Trade each day of the week until expiry
-            trading_days = []
-            current_day = week_start
-            while current_day <= expiry and current_day <= end_date:
-                if current_day >= start_date and current_day.weekday() < 5:  # Weekdays only
-                    trading_days.append(current_day)
-                current_day += timedelta(days=1)
+            # Trade each day of the week until expiry (weekdays inside the backtest range)
+            trading_days = [
+                day for day in (week_start + offset for offset in week_offsets[:expiry.weekday() + 1])
+                if start_date <= day <= end_date and day.weekday() < 5
+            ]
             
             for trade_date in trading_days:
-                # Random entry time within entry window
-                entry_h, entry_m = map(int, entry_start.split(':'))
-                end_h, end_m = map(int, entry_end.split(':'))
-                
                 # Random entry time between start and 1 hour after start
-                entry_mins = entry_h * 60 + entry_m + random.randint(0, 60)
+                entry_mins = entry_base_mins + int(rand() * 61)
                 actual_entry_time = f"{entry_mins // 60:02d}:{entry_mins % 60:02d}"
+                entry_date = format_iso_date(trade_date)
                 
-                if strategy in ["iron_condor", "both"]:
-                    trade = self.simulate_iron_condor(
-                        spot, expiry, trade_date,  # Pass trade_date!
-                        IC_CALL_SELL_DISTANCE, IC_CALL_BUY_DISTANCE,
-                        IC_PUT_SELL_DISTANCE, IC_PUT_BUY_DISTANCE
-                    )
+                for (simulate, label, premium_key, target_pct, sl_pct, qty,
+                     time_exit_bias, time_exit_range, exit_at, exit_at_mins, is_scalp) in active_strategies:
+                    trade = simulate(spot, expiry, trade_date)  # Pass trade_date!
+                    if label:
+                        trade["strategy"] = label
                     
                     # Track data source
                     if trade.get("data_source") == "API":
@@ -1181,146 +1785,73 @@ class Backtester:
                     else:
                         estimated_data_count += 1
                     
-                    # Simulate intraday exit
-                    exit_result = self.simulate_intraday_exit(
-                        trade["credit"],
-                        IC_TARGET_PERCENT,
-                        IC_STOP_LOSS_PERCENT,
-                        actual_entry_time,
-                        force_exit
-                    )
-                    
-                    # Calculate P&L
-                    if exit_result["exit_reason"] == "TARGET":
-                        pnl = trade["credit"] * QUANTITY * (IC_TARGET_PERCENT / 100) - CHARGES_PER_LOT
-                    elif exit_result["exit_reason"] == "STOP_LOSS":
-                        pnl = -trade["credit"] * QUANTITY * (IC_STOP_LOSS_PERCENT / 100) - CHARGES_PER_LOT
-                    else:  # TIME_EXIT
-                        # Random P&L between -50% and +40%
-                        time_exit_pct = (random.random() - 0.4) * 90
-                        pnl = trade["credit"] * QUANTITY * (time_exit_pct / 100) - CHARGES_PER_LOT
-                    
-                    trade["pnl"] = round(pnl, 2)
-                    trade["exit_reason"] = exit_result["exit_reason"]
-                    trade["entry_date"] = trade_date.strftime("%Y-%m-%d")
-                    trade["entry_time"] = actual_entry_time
-                    trade["exit_time"] = exit_result["exit_time"]
-                    trade["target_pct"] = IC_TARGET_PERCENT
-                    trade["sl_pct"] = IC_STOP_LOSS_PERCENT
-                    trade["quantity"] = QUANTITY
-                    trades.append(trade)
-                    capital += pnl
-                
-                if strategy in ["straddle", "both"]:
-                    trade = self.simulate_straddle(spot, expiry, trade_date)  # Pass trade_date!
-                    
-                    # Track data source
-                    if trade.get("data_source") == "API":
-                        api_data_count += 1
+                    if is_scalp:
+                        # Scalp has its own entry/exit times
+                        trade_entry_mins = scalp_base_mins + int(rand() * 16)  # Small random offset
+                        trade_entry_time = f"{trade_entry_mins // 60:02d}:{trade_entry_mins % 60:02d}"
                     else:
-                        estimated_data_count += 1
+                        trade_entry_mins, trade_entry_time = entry_mins, actual_entry_time
                     
                     # Simulate intraday exit
-                    exit_result = self.simulate_intraday_exit(
-                        trade["total_premium"],
-                        STR_TARGET_PERCENT,
-                        STR_STOP_LOSS_PERCENT,
-                        actual_entry_time,
-                        force_exit
-                    )
+                    premium = trade[premium_key]
+                    exit_mins, exit_reason, _ = self.simulate_exit_minutes(
+                        target_pct, sl_pct, trade_entry_mins, exit_at_mins)
                     
                     # Calculate P&L
-                    if exit_result["exit_reason"] == "TARGET":
-                        pnl = trade["total_premium"] * QUANTITY * (STR_TARGET_PERCENT / 100) - CHARGES_PER_LOT
-                    elif exit_result["exit_reason"] == "STOP_LOSS":
-                        pnl = -trade["total_premium"] * QUANTITY * (STR_STOP_LOSS_PERCENT / 100) - CHARGES_PER_LOT
+                    if exit_reason == "TARGET":
+                        pnl = premium * qty * (target_pct / 100) - CHARGES_PER_LOT
+                    elif exit_reason == "STOP_LOSS":
+                        pnl = -premium * qty * (sl_pct / 100) - CHARGES_PER_LOT
                     else:  # TIME_EXIT
-                        time_exit_pct = (random.random() - 0.4) * 50
-                        pnl = trade["total_premium"] * QUANTITY * (time_exit_pct / 100) - CHARGES_PER_LOT
+                        time_exit_pct = (rand() - time_exit_bias) * time_exit_range
+                        pnl = premium * qty * (time_exit_pct / 100) - CHARGES_PER_LOT
                     
                     trade["pnl"] = round(pnl, 2)
-                    trade["exit_reason"] = exit_result["exit_reason"]
-                    trade["entry_date"] = trade_date.strftime("%Y-%m-%d")
-                    trade["entry_time"] = actual_entry_time
-                    trade["exit_time"] = exit_result["exit_time"]
-                    trade["target_pct"] = STR_TARGET_PERCENT
-                    trade["sl_pct"] = STR_STOP_LOSS_PERCENT
-                    trade["quantity"] = QUANTITY
-                    trades.append(trade)
-                    capital += pnl
-                
-                if strategy in ["daily_scalp", "both"]:
-                    # Scalp uses same ATM straddle simulation but with scalp-specific params
-                    trade = self.simulate_straddle(spot, expiry, trade_date)
-                    trade["strategy"] = "DAILY_SCALP"
-                    
-                    if trade.get("data_source") == "API":
-                        api_data_count += 1
-                    else:
-                        estimated_data_count += 1
-                    
-                    # Scalp has its own entry/exit times
-                    scalp_entry_mins = int(SCALP_ENTRY_TIME.split(':')[0]) * 60 + int(SCALP_ENTRY_TIME.split(':')[1])
-                    scalp_entry_mins += random.randint(0, 15)  # Small random offset
-                    scalp_entry_time = f"{scalp_entry_mins // 60:02d}:{scalp_entry_mins % 60:02d}"
-                    
-                    exit_result = self.simulate_intraday_exit(
-                        trade["total_premium"],
-                        SCALP_TARGET_PERCENT,
-                        SCALP_STOP_LOSS_PERCENT,
-                        scalp_entry_time,
-                        SCALP_EXIT_TIME
-                    )
-                    
-                    if exit_result["exit_reason"] == "TARGET":
-                        pnl = trade["total_premium"] * SCALP_QUANTITY * (SCALP_TARGET_PERCENT / 100) - CHARGES_PER_LOT
-                    elif exit_result["exit_reason"] == "STOP_LOSS":
-                        pnl = -trade["total_premium"] * SCALP_QUANTITY * (SCALP_STOP_LOSS_PERCENT / 100) - CHARGES_PER_LOT
-                    else:  # TIME_EXIT
-                        # Scalp time exits tend to be smaller (shorter window)
-                        time_exit_pct = (random.random() - 0.35) * 40
-                        pnl = trade["total_premium"] * SCALP_QUANTITY * (time_exit_pct / 100) - CHARGES_PER_LOT
-                    
-                    trade["pnl"] = round(pnl, 2)
-                    trade["exit_reason"] = exit_result["exit_reason"]
-                    trade["entry_date"] = trade_date.strftime("%Y-%m-%d")
-                    trade["entry_time"] = scalp_entry_time
-                    trade["exit_time"] = exit_result["exit_time"]
-                    trade["target_pct"] = SCALP_TARGET_PERCENT
-                    trade["sl_pct"] = SCALP_STOP_LOSS_PERCENT
-                    trade["quantity"] = SCALP_QUANTITY
+                    trade["exit_reason"] = exit_reason
+                    trade["entry_date"] = entry_date
+                    trade["entry_time"] = trade_entry_time
+                    trade["exit_time"] = exit_at if exit_reason == "TIME_EXIT" else f"{exit_mins // 60:02d}:{exit_mins % 60:02d}"
+                    trade["target_pct"] = target_pct
+                    trade["sl_pct"] = sl_pct
+                    trade["quantity"] = qty
                     trades.append(trade)
                     capital += pnl
                 
                 # Update spot with small random walk
-                spot = spot * (1 + (random.random() - 0.5) * 0.01)
+                spot = spot * (1 + (rand() - 0.5) * 0.01)
         
-        # Calculate stats
+        # Calculate stats: counts, exit breakdown, exit-time and premium sums in one pass
         total_trades = len(trades)
-        winners = len([t for t in trades if t["pnl"] > 0])
-        losers = len([t for t in trades if t["pnl"] < 0])
-        total_pnl = sum(t["pnl"] for t in trades)
-        
-        # Exit reason breakdown
-        target_exits = len([t for t in trades if t["exit_reason"] == "TARGET"])
-        sl_exits = len([t for t in trades if t["exit_reason"] == "STOP_LOSS"])
-        time_exits = len([t for t in trades if t["exit_reason"] == "TIME_EXIT"])
-        
-        # Average times
+        winners = losers = 0
+        exit_counts = {"TARGET": 0, "STOP_LOSS": 0, "TIME_EXIT": 0}
+        exit_mins_sum = 0
+        premium_sum = 0
+        for t in trades:
+            pnl = t["pnl"]
+            if pnl > 0:
+                winners += 1
+            elif pnl < 0:
+                losers += 1
+            exit_counts[t["exit_reason"]] += 1
+            h, m = t["exit_time"].split(':')
+            exit_mins_sum += int(h) * 60 + int(m)
+            premium_sum += t.get("credit") or t.get("total_premium", 0)
+        target_exits = exit_counts["TARGET"]
+        sl_exits = exit_counts["STOP_LOSS"]
+        time_exits = exit_counts["TIME_EXIT"]
+        
+        # Equity curve and max drawdown in one pass, so the dashboard plots cum_pnl as-is
+        cum_pnl = list(accumulate(t["pnl"] for t in trades))
+        total_pnl = cum_pnl[-1] if cum_pnl else 0
+        max_drawdown = max((max(peak, 0) - c for peak, c in zip(accumulate(cum_pnl, max), cum_pnl)), default=0)
+        
+        # Averages
         avg_exit_time = "N/A"
-        if trades:
-            exit_mins = []
-            for t in trades:
-                h, m = map(int, t["exit_time"].split(':'))
-                exit_mins.append(h * 60 + m)
-            avg_mins = sum(exit_mins) // len(exit_mins)
-            avg_exit_time = f"{avg_mins // 60:02d}:{avg_mins % 60:02d}"
-        
-        # Average premium
         avg_premium = 0
         if trades:
-            premiums = [t.get("credit") or t.get("total_premium", 0) for t in trades]
-            avg_premium = sum(premiums) / len(premiums) if premiums else 0
+            avg_mins = exit_mins_sum // total_trades
+            avg_exit_time = f"{avg_mins // 60:02d}:{avg_mins % 60:02d}"
+            avg_premium = premium_sum / total_trades
         
         results = {
             "strategy": strategy,
@@ -1338,6 +1869,7 @@ class Backtester:
             "initial_capital": initial_capital,
             "final_capital": round(capital, 2),
             "return_pct": round((capital - initial_capital) / initial_capital * 100, 2),
+            "max_drawdown": round(max_drawdown, 2),
             "exit_breakdown": {
                 "target": target_exits,
                 "stop_loss": sl_exits,
@@ -1353,14 +1885,27 @@ class Backtester:
                 "estimated_data": estimated_data_count,
                 "use_historical_api": use_historical_api
             },
-            "trades": trades
+            "trades": trades,
+            "cum_pnl": [round(c, 2) for c in cum_pnl],
+            "dates": [t["entry_date"] for t in trades]
         }
         
-        # Save to history
+        # Save to history: the trades go to their own NDJSON file and the history keeps
+        # just the summary, so each run no longer re-serializes every earlier run's trades
+        run_at = datetime.now()
+        trades_file = os.path.join(BACKTEST_DIR, f"backtest_{run_at:%Y%m%d_%H%M%S_%f}.ndjson")
+        try:
+            os.makedirs(BACKTEST_DIR, exist_ok=True)
+            with open(trades_file, 'wb') as f:
+                f.write(b"".join(dumps_json(t) + b"\n" for t in trades))
+        except OSError as e:
+            logger.warning(f"Could not write backtest trades to {trades_file}: {e}")
+            trades_file = None
         history = load_trade_history()
         history["backtest_results"].append({
-            "timestamp": datetime.now().isoformat(),
-            "results": results
+            "timestamp": run_at.isoformat(),
+            "trades_file": trades_file,
+            "results": {k: v for k, v in results.items() if k not in ("trades", "cum_pnl", "dates")}
         })
         save_trade_history(history)
         
@@ -1374,6 +1919,12 @@ class Backtester:
 # IRON CONDOR STRATEGY (Improved v2.0)
 # ============================================
 class IronCondor:
+    # Leg layout shared by P&L math: sold legs +1, bought legs -1,
+    # so the signed sum of prices is the net premium of each spread
+    LEGS = ("sc", "bc", "sp", "bp")
+    LEG_KINDS = ("call", "call", "put", "put")
+    LEG_SIGNS = (1, -1, 1, -1)
+    
     def __init__(self, api):
         self.api = api
         self.position = None
@@ -1391,6 +1942,11 @@ class IronCondor:
         self.vix_at_entry = None
         self.day_high_at_entry = None
         self.day_low_at_entry = None
+        self.lock_token = None        # Entry guard token while a position is open
+    
+    def _leg_quotes(self):
+        """(strike, right) for each leg of the open position"""
+        return [(self.position[leg], kind) for leg, kind in zip(self.LEGS, self.LEG_KINDS)]
     
     def _check_vix_filter(self) -> tuple:
         """Check if India VIX is within acceptable range for IC entry.
@@ -1431,45 +1987,32 @@ class IronCondor:
         Falls back to fixed distances if option chain unavailable."""
         
         # Try to get option chain for smarter strike selection
-        chain = self.api.get_option_chain(expiry)
+        chain = self.api.fetch_and_cache_chain(expiry)
         if not chain:
             logger.info("🦅 Option chain unavailable, using fixed strike distances")
             return None
         
         try:
-            atm = round(spot / 50) * 50
+            atm = atm_strike(spot)
             
-            # Parse option chain into calls and puts
-            calls = {}
-            puts = {}
+            # One pass over the chain: sell strikes are the highest-OI strikes 100-300
+            # points OTM with LTP >= 5. High OI indicates strong resistance/support →
+            # good sell strikes; on equal OI the strike nearer ATM wins.
+            best = {"call": (0, float("inf"), None), "put": (0, float("inf"), None)}  # (oi, -dist, strike)
             for item in chain:
-                strike = int(float(item.get('strike_price', 0)))
                 right = item.get('right', '').lower()
+                if right not in best:
+                    continue
+                strike = int(float(item.get('strike_price', 0)))
+                dist = strike - atm if right == 'call' else atm - strike
+                if not 100 <= dist <= 300:
+                    continue
                 oi = int(item.get('open_interest', 0))
-                ltp = float(item.get('ltp', 0))
-                
-                if right == 'call' and strike > atm:
-                    calls[strike] = {"oi": oi, "ltp": ltp}
-                elif right == 'put' and strike < atm:
-                    puts[strike] = {"oi": oi, "ltp": ltp}
-            
-            # Find sell strikes: highest OI strikes within 100-300 points from ATM
-            # High OI indicates strong resistance/support → good sell strikes
-            best_call_sell = None
-            best_call_oi = 0
-            for strike in sorted(calls.keys()):
-                dist = strike - atm
-                if 100 <= dist <= 300 and calls[strike]["oi"] > best_call_oi and calls[strike]["ltp"] >= 5:
-                    best_call_oi = calls[strike]["oi"]
-                    best_call_sell = strike
+                if float(item.get('ltp', 0)) >= 5 and (oi, -dist) > best[right][:2]:
+                    best[right] = (oi, -dist, strike)
             
-            best_put_sell = None
-            best_put_oi = 0
-            for strike in sorted(puts.keys(), reverse=True):
-                dist = atm - strike
-                if 100 <= dist <= 300 and puts[strike]["oi"] > best_put_oi and puts[strike]["ltp"] >= 5:
-                    best_put_oi = puts[strike]["oi"]
-                    best_put_sell = strike
+            best_call_oi, _, best_call_sell = best["call"]
+            best_put_oi, _, best_put_sell = best["put"]
             
             if best_call_sell and best_put_sell:
                 # Buy strikes: 100 points beyond sell strikes
@@ -1540,7 +2083,7 @@ class IronCondor:
             return False
         
         # === STRIKE SELECTION ===
-        atm = round(spot / 50) * 50
+        atm = atm_strike(spot)
         
         # Try dynamic strike selection first
         if IC_STRIKE_MODE == "dynamic":
@@ -1551,11 +2094,9 @@ class IronCondor:
                 sp = dynamic_strikes["sp"]
                 bp = dynamic_strikes["bp"]
             else:
-                sc, bc = atm + IC_CALL_SELL_DISTANCE, atm + IC_CALL_BUY_DISTANCE
-                sp, bp = atm - IC_PUT_SELL_DISTANCE, atm - IC_PUT_BUY_DISTANCE
+                sc, bc, sp, bp = (atm + o for o in _IC_OFFSETS)
         else:
-            sc, bc = atm + IC_CALL_SELL_DISTANCE, atm + IC_CALL_BUY_DISTANCE
-            sp, bp = atm - IC_PUT_SELL_DISTANCE, atm - IC_PUT_BUY_DISTANCE
+            sc, bc, sp, bp = (atm + o for o in _IC_OFFSETS)
         
         # Apply spot buffer (widen if near day's high/low)
         sc, bc, sp, bp = self._apply_spot_buffer(spot, sc, bc, sp, bp)
@@ -1565,16 +2106,23 @@ class IronCondor:
         logger.info(f"🦅 IC Setup: ATM={atm}, Strikes: SC={sc}, BC={bc}, SP={sp}, BP={bp}")
         logger.info(f"🦅 IC Expiry: {expiry_display}, VIX: {vix}")
         
+        # === PREDICTED CREDIT (optionally skip 4 quote calls on entries unlikely to qualify) ===
+        min_req = max(MIN_PREMIUM, IC_MIN_CREDIT)
+        iv = self.api.get_atm_iv() if PREDICTED_CREDIT_MARGIN > 0 else None
+        years = years_to_expiry(expiry)
+        if iv and years:
+            predicted = (bs_price(spot, sc, years, iv, "call") - bs_price(spot, bc, years, iv, "call")
+                         + bs_price(spot, sp, years, iv, "put") - bs_price(spot, bp, years, iv, "put"))
+            if predicted_credit_too_low(predicted, min_req):
+                logger.info(f"🦅 IC skipped: Predicted credit {predicted:.1f} below min {min_req} (IV {iv:.2%})")
+                return False
+        
         # === FETCH PREMIUMS ===
         logger.info(f"📊 Fetching premiums (with rate limiting)...")
         
-        sc_p = self.api.get_ltp_with_retry(sc, "call", expiry) or 0
-        time.sleep(1)
-        bc_p = self.api.get_ltp_with_retry(bc, "call", expiry) or 0
-        time.sleep(1)
-        sp_p = self.api.get_ltp_with_retry(sp, "put", expiry) or 0
-        time.sleep(1)
-        bp_p = self.api.get_ltp_with_retry(bp, "put", expiry) or 0
+        self.api.prefetch_legs([(sc, "call"), (bc, "call"), (sp, "put"), (bp, "put")], expiry)
+        sc_p, bc_p, sp_p, bp_p = (p or 0 for p in self.api.get_ltps_with_retry(
+            [(sc, "call"), (bc, "call"), (sp, "put"), (bp, "put")], expiry))
         
         logger.info(f"📊 Premiums: SC={sc_p}, BC={bc_p}, SP={sp_p}, BP={bp_p}")
         
@@ -1592,7 +2140,6 @@ class IronCondor:
         logger.info(f"📊 Net Credit: {credit:.2f} (Call spread: {call_credit:.2f}, Put spread: {put_credit:.2f})")
         
         # Check minimum credit (use IC_MIN_CREDIT which is smarter than MIN_PREMIUM)
-        min_req = max(MIN_PREMIUM, IC_MIN_CREDIT)
         if credit < min_req:
             logger.info(f"🦅 IC skipped: Credit {credit:.0f} < {min_req}")
             return False
@@ -1606,6 +2153,12 @@ class IronCondor:
         
         logger.info(f"🦅 IC Entry: Credit={credit:.0f}, MaxLoss={max_loss_per_side:.0f}, R:R=1:{credit/max_loss_per_side:.1f}, Qty={QUANTITY} ({NUM_LOTS} lots)")
         
+        # Make sure no other replica already holds an IC position
+        self.lock_token = entry_guard.acquire("ic")
+        if not self.lock_token:
+            logger.info("🦅 IC skipped: another instance holds an active IC position")
+            return False
+        
         # === PLACE ORDERS ===
         self.api.place_order(sc, "call", expiry, QUANTITY, "sell", sc_p)
         self.api.place_order(bc, "call", expiry, QUANTITY, "buy", bc_p)
@@ -1619,7 +2172,7 @@ class IronCondor:
         self.call_credit = call_credit
         self.put_credit = put_credit
         self.entry_prices = {"sc": sc_p, "bc": bc_p, "sp": sp_p, "bp": bp_p}
-        self.entry_time = datetime.now().isoformat()
+        self.entry_time = time.time_ns()  # Epoch nanoseconds
         self.spot_at_entry = spot
         self.vix_at_entry = vix
         self.peak_pnl_pct = 0
@@ -1659,7 +2212,8 @@ class IronCondor:
                 "num_lots": NUM_LOTS,
                 "peak_pnl_pct": self.peak_pnl_pct,
                 "call_spread_closed": self.call_spread_closed,
-                "put_spread_closed": self.put_spread_closed
+                "put_spread_closed": self.put_spread_closed,
+                "lock_token": self.lock_token
             }
         else:
             pos_data["iron_condor"] = None
@@ -1670,14 +2224,16 @@ class IronCondor:
         if not self.position:
             return None
         
-        sc = self.api.get_ltp(self.position["sc"], "call", self.position["expiry"]) or self.entry_prices.get("sc", 0)
-        bc = self.api.get_ltp(self.position["bc"], "call", self.position["expiry"]) or self.entry_prices.get("bc", 0)
-        sp = self.api.get_ltp(self.position["sp"], "put", self.position["expiry"]) or self.entry_prices.get("sp", 0)
-        bp = self.api.get_ltp(self.position["bp"], "put", self.position["expiry"]) or self.entry_prices.get("bp", 0)
+        self.api.prefetch_legs(self._leg_quotes(), self.position["expiry"])
+        prices = [
+            ltp or self.entry_prices.get(leg, 0)
+            for leg, ltp in zip(self.LEGS, self.api.get_ltps(self._leg_quotes(), self.position["expiry"]))
+        ]
+        signed = [p * sign for p, sign in zip(prices, self.LEG_SIGNS)]
         
         # Per-spread P&L
-        current_call_spread = sc - bc
-        current_put_spread = sp - bp
+        current_call_spread = signed[0] + signed[1]
+        current_put_spread = signed[2] + signed[3]
         call_spread_pnl = (self.call_credit - current_call_spread) if not self.call_spread_closed else 0
         put_spread_pnl = (self.put_credit - current_put_spread) if not self.put_spread_closed else 0
         
@@ -1703,7 +2259,7 @@ class IronCondor:
             self.peak_pnl_pct = pnl_pct
         
         return {
-            "current_prices": {"sc": sc, "bc": bc, "sp": sp, "bp": bp},
+            "current_prices": dict(zip(self.LEGS, prices)),
             "current_premium": current_premium,
             "entry_premium": self.entry_premium,
             "pnl_points": pnl_points,
@@ -1761,9 +2317,12 @@ class IronCondor:
         if not self.position:
             return None
         
+        entry_guard.refresh("ic", self.lock_token)
+        
         pnl_data = self.get_live_pnl()
         if not pnl_data:
             return None
+        live_feed.publish("iron_condor", pnl_data)
         
         pnl_pct = pnl_data["pnl_percent"]
         
@@ -1812,10 +2371,8 @@ class IronCondor:
             return 0
         
         # Get current prices for P&L calculation
-        sc = self.api.get_ltp(self.position["sc"], "call", self.position["expiry"]) or 0
-        bc = self.api.get_ltp(self.position["bc"], "call", self.position["expiry"]) or 0
-        sp = self.api.get_ltp(self.position["sp"], "put", self.position["expiry"]) or 0
-        bp = self.api.get_ltp(self.position["bp"], "put", self.position["expiry"]) or 0
+        self.api.prefetch_legs(self._leg_quotes(), self.position["expiry"])
+        sc, bc, sp, bp = (p or 0 for p in self.api.get_ltps(self._leg_quotes(), self.position["expiry"]))
         
         # Only place orders for spreads that are still open
         if not self.call_spread_closed:
@@ -1864,6 +2421,9 @@ class IronCondor:
         telegram.send(f"🦅 <b>IC Exit</b> {exit_emoji}\n{reason}\nP&L: ₹{pnl:+,.0f}\nPeak P&L: {self.peak_pnl_pct:.1f}%{adjusted_str}")
         logger.info(f"🦅 IC Exit: {reason}, P&L: {pnl}, Peak: {self.peak_pnl_pct:.1f}%")
         
+        entry_guard.release("ic", self.lock_token)
+        live_feed.publish("iron_condor", None)
+        self.lock_token = None
         self.position = None
         self.entry_prices = {}
         self.call_spread_closed = False
@@ -1885,17 +2445,24 @@ class ShortStraddle:
         self.spot_at_entry = None
         
     def enter(self, spot, expiry):
-        atm = round(spot / 50) * 50
+        atm = atm_strike(spot)
         
         # Log what we're trying to do
         expiry_display = expiry.strftime('%d-%b-%Y') if isinstance(expiry, datetime) else expiry
         logger.info(f"📊 Straddle Setup: ATM={atm}, Expiry={expiry_display}")
         
+        # Optionally skip the quote calls when the estimated premium is far below the minimum
+        iv = self.api.get_atm_iv() if PREDICTED_CREDIT_MARGIN > 0 else None
+        years = years_to_expiry(expiry)
+        if iv and years:
+            predicted = bs_price(spot, atm, years, iv, "call") + bs_price(spot, atm, years, iv, "put")
+            if predicted_credit_too_low(predicted, MIN_PREMIUM):
+                logger.info(f"📊 Straddle skipped: Predicted premium {predicted:.1f} below min {MIN_PREMIUM} (IV {iv:.2%})")
+                return False
+        
         # Get LTPs with delays to avoid rate limits
         logger.info(f"📊 Fetching premiums (with rate limiting)...")
-        ce = self.api.get_ltp_with_retry(atm, "call", expiry) or 0
-        time.sleep(1)  # Delay between calls
-        pe = self.api.get_ltp_with_retry(atm, "put", expiry) or 0
+        ce, pe = (p or 0 for p in self.api.get_ltps_with_retry([(atm, "call"), (atm, "put")], expiry))
         
         logger.info(f"📊 Premiums: CE={ce}, PE={pe}")
         
@@ -1921,7 +2488,7 @@ class ShortStraddle:
         self.position = {"strike": atm, "expiry": expiry, "expiry_str": expiry_str}
         self.entry_premium = total
         self.entry_prices = {"ce": ce, "pe": pe}
-        self.entry_time = datetime.now().isoformat()
+        self.entry_time = time.time_ns()  # Epoch nanoseconds
         self.spot_at_entry = spot
         
         # Save to file for dashboard
@@ -1954,8 +2521,10 @@ class ShortStraddle:
         if not self.position:
             return None
         
-        ce = self.api.get_ltp(self.position["strike"], "call", self.position["expiry"]) or self.entry_prices.get("ce", 0)
-        pe = self.api.get_ltp(self.position["strike"], "put", self.position["expiry"]) or self.entry_prices.get("pe", 0)
+        ce, pe = self.api.get_ltps([(self.position["strike"], "call"), (self.position["strike"], "put")],
+                                   self.position["expiry"])
+        ce = ce or self.entry_prices.get("ce", 0)
+        pe = pe or self.entry_prices.get("pe", 0)
         
         current_premium = ce + pe
         pnl_points = self.entry_premium - current_premium
@@ -1998,8 +2567,8 @@ class ShortStraddle:
         if not self.position:
             return 0
         
-        ce = self.api.get_ltp(self.position["strike"], "call", self.position["expiry"]) or 0
-        pe = self.api.get_ltp(self.position["strike"], "put", self.position["expiry"]) or 0
+        ce, pe = (p or 0 for p in self.api.get_ltps(
+            [(self.position["strike"], "call"), (self.position["strike"], "put")], self.position["expiry"]))
         
         self.api.place_order(self.position["strike"], "call", self.position["expiry"], QUANTITY, "buy", ce)
         self.api.place_order(self.position["strike"], "put", self.position["expiry"], QUANTITY, "buy", pe)
@@ -2056,6 +2625,7 @@ class DailyScalp:
         self.sl_hit_today = False
         self.sl_hit_date = None
         self.vix_at_entry = None
+        self.lock_token = None  # Entry guard token while a position is open
     
     def _check_vix(self) -> tuple:
         """Check VIX is in acceptable range for scalp"""
@@ -2090,16 +2660,23 @@ class DailyScalp:
             telegram.send(f"⚡ Scalp Entry skipped\n{vix_reason}")
             return False
         
-        atm = round(spot / 50) * 50
+        atm = atm_strike(spot)
         expiry_display = expiry.strftime('%d-%b-%Y') if isinstance(expiry, datetime) else expiry
         
         logger.info(f"⚡ Scalp Setup: ATM={atm}, Spot={spot}, Expiry={expiry_display}")
         
+        # Optionally skip the quote calls when the estimated premium is far below the minimum
+        iv = self.api.get_atm_iv() if PREDICTED_CREDIT_MARGIN > 0 else None
+        years = years_to_expiry(expiry)
+        if iv and years:
+            predicted = bs_price(spot, atm, years, iv, "call") + bs_price(spot, atm, years, iv, "put")
+            if predicted_credit_too_low(predicted, SCALP_MIN_PREMIUM):
+                logger.info(f"⚡ Scalp skipped: Predicted premium {predicted:.1f} below min {SCALP_MIN_PREMIUM} (IV {iv:.2%})")
+                return False
+        
         # Fetch premiums
         logger.info(f"⚡ Fetching ATM premiums...")
-        ce = self.api.get_ltp_with_retry(atm, "call", expiry) or 0
-        time.sleep(1)
-        pe = self.api.get_ltp_with_retry(atm, "put", expiry) or 0
+        ce, pe = (p or 0 for p in self.api.get_ltps_with_retry([(atm, "call"), (atm, "put")], expiry))
         
         logger.info(f"⚡ Premiums: CE={ce}, PE={pe}")
         
@@ -2116,6 +2693,12 @@ class DailyScalp:
         
         logger.info(f"⚡ Scalp Entry: {atm}, Premium={total:.0f}, Qty={SCALP_QUANTITY} ({SCALP_NUM_LOTS} lots)")
         
+        # Make sure no other replica already holds a scalp position
+        self.lock_token = entry_guard.acquire("scalp")
+        if not self.lock_token:
+            logger.info("⚡ Scalp skipped: another instance holds an active scalp position")
+            return False
+        
         # Place orders — SELL CE + SELL PE (naked straddle)
         self.api.place_order(atm, "call", expiry, SCALP_QUANTITY, "sell", ce)
         self.api.place_order(atm, "put", expiry, SCALP_QUANTITY, "sell", pe)
@@ -2125,7 +2708,7 @@ class DailyScalp:
         self.position = {"strike": atm, "expiry": expiry, "expiry_str": expiry_str}
         self.entry_premium = total
         self.entry_prices = {"ce": ce, "pe": pe}
-        self.entry_time = datetime.now().isoformat()
+        self.entry_time = time.time_ns()  # Epoch nanoseconds
         self.spot_at_entry = spot
         self.peak_pnl_pct = 0
         self.vix_at_entry = vix
@@ -2164,7 +2747,8 @@ class DailyScalp:
                 "expiry": self.position.get("expiry_str", ""),
                 "quantity": SCALP_QUANTITY,
                 "num_lots": SCALP_NUM_LOTS,
-                "peak_pnl_pct": self.peak_pnl_pct
+                "peak_pnl_pct": self.peak_pnl_pct,
+                "lock_token": self.lock_token
             }
         else:
             pos_data["daily_scalp"] = None
@@ -2175,8 +2759,10 @@ class DailyScalp:
         if not self.position:
             return None
         
-        ce = self.api.get_ltp(self.position["strike"], "call", self.position["expiry"]) or self.entry_prices.get("ce", 0)
-        pe = self.api.get_ltp(self.position["strike"], "put", self.position["expiry"]) or self.entry_prices.get("pe", 0)
+        ce, pe = self.api.get_ltps([(self.position["strike"], "call"), (self.position["strike"], "put")],
+                                   self.position["expiry"])
+        ce = ce or self.entry_prices.get("ce", 0)
+        pe = pe or self.entry_prices.get("pe", 0)
         
         current_premium = ce + pe
         pnl_points = self.entry_premium - current_premium
@@ -2213,9 +2799,12 @@ class DailyScalp:
         if not self.position:
             return None
         
+        entry_guard.refresh("scalp", self.lock_token)
+        
         pnl_data = self.get_live_pnl()
         if not pnl_data:
             return None
+        live_feed.publish("daily_scalp", pnl_data)
         
         pnl_pct = pnl_data["pnl_percent"]
         spot_move = pnl_data["spot_move"]
@@ -2253,8 +2842,8 @@ class DailyScalp:
         if not self.position:
             return 0
         
-        ce = self.api.get_ltp(self.position["strike"], "call", self.position["expiry"]) or 0
-        pe = self.api.get_ltp(self.position["strike"], "put", self.position["expiry"]) or 0
+        ce, pe = (p or 0 for p in self.api.get_ltps(
+            [(self.position["strike"], "call"), (self.position["strike"], "put")], self.position["expiry"]))
         
         # Buy back to close
         self.api.place_order(self.position["strike"], "call", self.position["expiry"], SCALP_QUANTITY, "buy", ce)
@@ -2296,14 +2885,17 @@ class DailyScalp:
         )
         logger.info(f"⚡ Scalp Exit: {reason}, P&L: {pnl:+,.0f}, Peak: {self.peak_pnl_pct:.1f}%")
         
+        entry_guard.release("scalp", self.lock_token)
+        live_feed.publish("daily_scalp", None)
+        self.lock_token = None
         self.position = None
         self.entry_prices = {}
         self.peak_pnl_pct = 0
         self._save_position()
         return pnl
-def is_trading_time():
+def is_trading_time(now: datetime = None):
     """Check if current time is within entry window (IST)"""
-    now = get_ist_now()
+    now = now or get_ist_now()
     if now.weekday() not in TRADING_DAYS:
         return False
     
@@ -2315,26 +2907,33 @@ def is_trading_time():
     logger.debug(f"Trading time check: {current_time} IST, Window: {ENTRY_TIME_START}-{ENTRY_TIME_END}, In window: {in_window}")
     return in_window
 
-def is_exit_time():
+def is_exit_time(now: datetime = None):
     """Check if current time is past exit time (IST)"""
-    now = get_ist_now()
+    now = now or get_ist_now()
     current_time = now.strftime("%H:%M")
     
     is_exit = current_time >= EXIT_TIME
     logger.debug(f"Exit time check: {current_time} IST >= {EXIT_TIME}, Should exit: {is_exit}")
     return is_exit
 
-def is_market_hours():
+def is_market_hours(now: datetime = None):
     """Check if market is open (9:15 AM - 3:30 PM IST)"""
-    now = get_ist_now()
+    now = now or get_ist_now()
     if now.weekday() not in TRADING_DAYS:
         return False
     current_time = now.strftime("%H:%M")
     return "09:15" <= current_time <= "15:30"
 
+# Set by dashboard routes and incoming Telegram commands so the bot loop acts on
+# them now instead of after the rest of its CHECK_INTERVAL sleep
+bot_wakeup = threading.Event()
+
+def bot_sleep(seconds: float):
+    """Sleep between bot ticks, returning early when bot_wakeup is set"""
+    if bot_wakeup.wait(seconds):
+        bot_wakeup.clear()
+
 def bot_thread():
-    global _live_ic, _live_scalp
-    
     logger.info("🤖 Bot thread starting...")
     logger.info(f"⏰ Entry Time: {ENTRY_TIME_START} - {ENTRY_TIME_END} IST")
     logger.info(f"⏰ Exit Time: {EXIT_TIME} IST")
@@ -2371,14 +2970,13 @@ def bot_thread():
             logger.info("✅ Bot auto-started")
             telegram.send("🤖 Bot auto-started on deployment")
     
+    # Telegram commands arrive via a long-poll thread and are drained each tick
+    telegram.start_polling()
+    
     api = BreezeAPI()
     ic = IronCondor(api)
     scalp = DailyScalp(api)
     
-    # Set global references for live P&L API
-    _live_ic = ic
-    _live_scalp = scalp
-    
     # === POSITION RECOVERY ON RESTART ===
     # If there was an active position stored from before a restart, recover it
     try:
@@ -2403,12 +3001,13 @@ def bot_thread():
                 ic.call_credit = stored_ic.get("call_credit", ic.entry_premium / 2)
                 ic.put_credit = stored_ic.get("put_credit", ic.entry_premium / 2)
                 ic.entry_prices = stored_ic.get("entry_prices", {})
-                ic.entry_time = stored_ic.get("entry_time", "")
+                ic.entry_time = stored_ic.get("entry_time")
                 ic.spot_at_entry = stored_ic.get("spot_at_entry", 0)
                 ic.vix_at_entry = stored_ic.get("vix_at_entry")
                 ic.peak_pnl_pct = stored_ic.get("peak_pnl_pct", 0)
                 ic.call_spread_closed = stored_ic.get("call_spread_closed", False)
                 ic.put_spread_closed = stored_ic.get("put_spread_closed", False)
+                ic.lock_token = stored_ic.get("lock_token")
                 
                 logger.info(f"🔄 Recovered IC position: SC={strikes['sell_call']}, SP={strikes['sell_put']}, Credit={ic.entry_premium}")
                 telegram.send(f"🔄 Recovered IC position after restart\nSC={strikes['sell_call']}CE / SP={strikes['sell_put']}PE\nCredit: ₹{ic.entry_premium:.0f}")
@@ -2428,10 +3027,11 @@ def bot_thread():
                 }
                 scalp.entry_premium = stored_scalp.get("entry_premium", 0)
                 scalp.entry_prices = stored_scalp.get("entry_prices", {})
-                scalp.entry_time = stored_scalp.get("entry_time", "")
+                scalp.entry_time = stored_scalp.get("entry_time")
                 scalp.spot_at_entry = stored_scalp.get("spot_at_entry", 0)
                 scalp.vix_at_entry = stored_scalp.get("vix_at_entry")
                 scalp.peak_pnl_pct = stored_scalp.get("peak_pnl_pct", 0)
+                scalp.lock_token = stored_scalp.get("lock_token")
                 
                 logger.info(f"🔄 Recovered Scalp position: Strike={stored_scalp['strike']}, Premium={scalp.entry_premium}")
                 telegram.send(f"🔄 Recovered Scalp position after restart\nStrike={stored_scalp['strike']}\nPremium: ₹{scalp.entry_premium:.0f}")
@@ -2475,7 +3075,7 @@ def bot_thread():
                 last_status_log = datetime.now()
             
             if not bot_running:
-                time.sleep(10)
+                bot_sleep(10)
                 continue
             
             # Connect to API if needed (only during market hours)
@@ -2491,10 +3091,10 @@ def bot_thread():
                 
                 if not api.connected:
                     logger.warning("❌ API not connected, waiting...")
-                    time.sleep(30)
+                    bot_sleep(30)
                     continue
             else:
-                time.sleep(60)
+                bot_sleep(60)
                 continue
             
             # Force exit time (for IC — scalp has its own exit time)
@@ -2506,7 +3106,7 @@ def bot_thread():
                 if scalp.position:
                     logger.info("⏰ Market exit time - force closing Daily Scalp")
                     scalp.exit("TIME_EXIT")
-                time.sleep(60)
+                bot_sleep(60)
                 continue
             
             # Check exits for existing positions
@@ -2561,7 +3161,7 @@ def bot_thread():
                 else:
                     logger.warning("⚠️ Could not get spot price")
             
-            time.sleep(CHECK_INTERVAL)
+            bot_sleep(CHECK_INTERVAL)
             
         except Exception as e:
             logger.error(f"❌ Bot error: {e}")
@@ -2572,1360 +3172,261 @@ def bot_thread():
 # ============================================
 # HTML DASHBOARD (with Backtesting UI)
 # ============================================
-DASHBOARD_HTML = """
-<!DOCTYPE html>
-<html lang="en">
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>🤖 Nifty Trading Bot</title>
-    <script src="https://cdn.jsdelivr.net/npm/chart.js"></script>
-    <style>
-        * { margin: 0; padding: 0; box-sizing: border-box; }
-        body {
-            font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', Roboto, sans-serif;
-            background: linear-gradient(135deg, #0f0f1a 0%, #1a1a2e 50%, #16213e 100%);
-            color: #fff;
-            min-height: 100vh;
-        }
-        .container { max-width: 1200px; margin: 0 auto; padding: 20px; }
-        .header {
-            text-align: center;
-            padding: 30px 0;
-            border-bottom: 1px solid #333;
-            margin-bottom: 30px;
-        }
-        .header h1 { font-size: 2.5rem; margin-bottom: 10px; }
-        .badges { display: flex; justify-content: center; gap: 15px; flex-wrap: wrap; margin-top: 15px; }
-        .badge {
-            padding: 8px 16px;
-            border-radius: 20px;
-            font-size: 0.85rem;
-            font-weight: 600;
-        }
-        .badge-online { background: #00c853; }
-        .badge-offline { background: #ff5252; }
-        .badge-session { background: #333; }
-        .badge-session.active { background: #2196f3; }
-        
-        .cards { display: grid; grid-template-columns: repeat(auto-fit, minmax(200px, 1fr)); gap: 20px; margin-bottom: 30px; }
-        .card {
-            background: rgba(255,255,255,0.05);
-            border-radius: 15px;
-            padding: 25px;
-            text-align: center;
-            border: 1px solid rgba(255,255,255,0.1);
-        }
-        .card-label { color: #888; font-size: 0.9rem; margin-bottom: 8px; }
-        .card-value { font-size: 1.8rem; font-weight: 700; }
-        .positive { color: #00c853; }
-        .negative { color: #ff5252; }
-        
-        /* Live Position Styles */
-        .position-card {
-            background: rgba(255,255,255,0.05);
-            border-radius: 12px;
-            padding: 20px;
-            margin-bottom: 15px;
-            border: 1px solid rgba(255,255,255,0.1);
-        }
-        .position-header {
-            display: flex;
-            justify-content: space-between;
-            align-items: center;
-            margin-bottom: 15px;
-            padding-bottom: 10px;
-            border-bottom: 1px solid rgba(255,255,255,0.1);
-        }
-        .position-strategy {
-            font-size: 1.1rem;
-            font-weight: 600;
-            color: #00d2ff;
-        }
-        .position-pnl {
-            font-size: 1.4rem;
-            font-weight: 700;
-        }
-        .position-details {
-            display: grid;
-            grid-template-columns: repeat(auto-fit, minmax(150px, 1fr));
-            gap: 10px;
-            margin-bottom: 15px;
-        }
-        .position-row {
-            display: flex;
-            justify-content: space-between;
-            font-size: 0.85rem;
-            color: #aaa;
-        }
-        .position-row span:last-child {
-            color: #fff;
-            font-weight: 500;
-        }
-        .position-table {
-            width: 100%;
-            border-collapse: collapse;
-            margin-bottom: 15px;
-            font-size: 0.9rem;
-        }
-        .position-table th {
-            background: rgba(255,255,255,0.05);
-            padding: 10px;
-            text-align: left;
-            color: #888;
-            font-weight: 500;
-        }
-        .position-table td {
-            padding: 10px;
-            border-bottom: 1px solid rgba(255,255,255,0.05);
-        }
-        .position-summary {
-            display: grid;
-            grid-template-columns: repeat(auto-fit, minmax(140px, 1fr));
-            gap: 15px;
-            padding: 15px;
-            background: rgba(0,0,0,0.2);
-            border-radius: 8px;
-            margin-bottom: 15px;
-        }
-        .summary-item {
-            text-align: center;
-        }
-        .summary-item span:first-child {
-            display: block;
-            font-size: 0.75rem;
-            color: #888;
-            margin-bottom: 5px;
-        }
-        .summary-item span:last-child {
-            font-size: 1.1rem;
-            font-weight: 600;
-        }
-        .pnl-value.positive { color: #00c853; }
-        .pnl-value.negative { color: #ff5252; }
-        
-        .position-progress {
-            margin-top: 15px;
-        }
-        .progress-bar {
-            position: relative;
-            height: 24px;
-            background: linear-gradient(90deg, #ff5252 0%, #ff5252 33%, #333 33%, #333 67%, #00c853 67%, #00c853 100%);
-            border-radius: 12px;
-            overflow: hidden;
-        }
-        .progress-fill {
-            position: absolute;
-            left: 50%;
-            top: 50%;
-            transform: translate(-50%, -50%);
-            width: 4px;
-            height: 100%;
-            background: #fff;
-            border-radius: 2px;
-            transition: left 0.3s ease;
-        }
-        .progress-markers {
-            position: absolute;
-            width: 100%;
-            height: 100%;
-            display: flex;
-            justify-content: space-between;
-            align-items: center;
-            padding: 0 10px;
-            font-size: 0.7rem;
-            color: rgba(255,255,255,0.7);
-        }
-        .progress-labels {
-            display: flex;
-            justify-content: space-between;
-            margin-top: 5px;
-            font-size: 0.75rem;
-            color: #888;
-        }
-        .no-position {
-            text-align: center;
-            padding: 40px;
-            color: #666;
-        }
-        .no-position p:first-child {
-            font-size: 1.2rem;
-            margin-bottom: 10px;
-        }
-        
-        .section {
-            background: rgba(255,255,255,0.03);
-            border-radius: 15px;
-            padding: 25px;
-            margin-bottom: 25px;
-            border: 1px solid rgba(255,255,255,0.08);
-        }
-        .section-title { font-size: 1.2rem; margin-bottom: 20px; color: #00d2ff; }
-        
-        .strategy-grid { display: grid; grid-template-columns: repeat(auto-fit, minmax(180px, 1fr)); gap: 15px; }
-        .strategy-btn {
-            background: rgba(255,255,255,0.05);
-            border: 2px solid transparent;
-            border-radius: 12px;
-            padding: 20px;
-            cursor: pointer;
-            transition: all 0.3s;
-            text-align: center;
-        }
-        .strategy-btn:hover { background: rgba(255,255,255,0.1); }
-        .strategy-btn.active { border-color: #00d2ff; background: rgba(0,210,255,0.1); }
-        .strategy-btn h4 { margin-bottom: 8px; }
-        .strategy-btn p { font-size: 0.8rem; color: #888; }
-        
-        .btn {
-            background: linear-gradient(135deg, #00d2ff, #3a7bd5);
-            border: none;
-            padding: 12px 25px;
-            border-radius: 8px;
-            color: #fff;
-            font-weight: 600;
-            cursor: pointer;
-            transition: transform 0.2s;
-        }
-        .btn:hover { transform: scale(1.05); }
-        .btn-success { background: linear-gradient(135deg, #00c853, #00a843); }
-        .btn-danger { background: linear-gradient(135deg, #ff5252, #d32f2f); }
-        .btn-warning { background: linear-gradient(135deg, #ff9800, #f57c00); }
-        
-        .session-input { display: flex; gap: 10px; margin-top: 15px; }
-        .session-input input {
-            flex: 1;
-            padding: 12px;
-            border-radius: 8px;
-            border: 1px solid #333;
-            background: #1a1a2e;
-            color: #fff;
-        }
-        
-        .chart-container { height: 300px; margin-top: 20px; }
-        
-        table { width: 100%; border-collapse: collapse; margin-top: 15px; }
-        th, td { padding: 12px; text-align: left; border-bottom: 1px solid #333; }
-        th { color: #888; font-weight: 500; }
-        
-        .info-text { color: #888; font-size: 0.9rem; }
-        
-        .backtest-form { display: grid; grid-template-columns: repeat(auto-fit, minmax(200px, 1fr)); gap: 15px; margin-bottom: 15px; }
-        .backtest-form input, .backtest-form select {
-            padding: 12px;
-            border-radius: 8px;
-            border: 1px solid #333;
-            background: #1a1a2e;
-            color: #fff;
-        }
-        .backtest-results { 
-            background: rgba(0, 210, 255, 0.1); 
-            border-radius: 10px; 
-            padding: 20px; 
-            margin-top: 20px;
-            display: none;
-        }
-        .backtest-results.show { display: block; }
-        .result-grid { display: grid; grid-template-columns: repeat(auto-fit, minmax(150px, 1fr)); gap: 15px; }
-        .result-item { text-align: center; }
-        .result-value { font-size: 1.5rem; font-weight: bold; }
-        .result-label { font-size: 0.8rem; color: #888; }
-        
-        /* Backtest trades table */
-        #bt-trades-body tr:hover { background: rgba(255,255,255,0.05); }
-        #bt-trades-body td { font-size: 0.85rem; }
-        .exit-target { color: #00c853 !important; font-weight: 600; }
-        .exit-sl { color: #ff5252 !important; font-weight: 600; }
-        .exit-time { color: #ff9800 !important; }
-        
-        .tabs { display: flex; gap: 10px; margin-bottom: 20px; }
-        .tab {
-            padding: 10px 20px;
-            background: rgba(255,255,255,0.05);
-            border-radius: 8px;
-            cursor: pointer;
-            transition: all 0.3s;
-        }
-        .tab.active { background: #00d2ff; color: #000; }
-        .tab-content { display: none; }
-        .tab-content.active { display: block; }
-    </style>
-</head>
-<body>
-    <div class="container">
-        <div class="header">
-            <h1>🤖 Nifty Trading Bot</h1>
-            <p>Automated Options Trading with Iron Condor & Short Straddle</p>
-            <div class="badges">
-                <span class="badge badge-offline" id="bot-badge">⏸️ STOPPED</span>
-                <span class="badge" id="strategy-badge">IRON CONDOR</span>
-                <span class="badge badge-session" id="session-badge">🔑 NO SESSION</span>
-            </div>
-            <div class="badges" style="margin-top: 10px;">
-                <span class="badge" id="time-badge" style="background: #333;">🕐 --:--:-- IST</span>
-                <span class="badge" id="market-badge" style="background: #666;">📊 MARKET CLOSED</span>
-                <span class="badge" id="window-badge" style="background: #666;">⏳ WAITING</span>
-                <span class="badge" id="expiry-badge" style="background: #9c27b0;">📅 Expiry: --</span>
-            </div>
-        </div>
-        
-        <div class="tabs">
-            <div class="tab active" onclick="showTab('live')">📈 Live Trading</div>
-            <div class="tab" onclick="showTab('backtest')">🔬 Backtesting</div>
-            <div class="tab" onclick="showTab('history')">📜 Trade History</div>
-        </div>
-        
-        <!-- LIVE TRADING TAB -->
-        <div class="tab-content active" id="tab-live">
-            <div class="cards">
-                <div class="card">
-                    <div class="card-label">Total P&L</div>
-                    <div class="card-value positive" id="total-pnl">₹0</div>
-                </div>
-                <div class="card">
-                    <div class="card-label">Today's P&L</div>
-                    <div class="card-value" id="daily-pnl">₹0</div>
-                </div>
-                <div class="card">
-                    <div class="card-label">Win Rate</div>
-                    <div class="card-value" id="win-rate">0%</div>
-                </div>
-                <div class="card">
-                    <div class="card-label">Portfolio Value</div>
-                    <div class="card-value" id="portfolio">₹5,00,000</div>
-                </div>
-            </div>
-            
-            <!-- LIVE POSITION SECTION -->
-            <div class="section" id="position-section" style="display: none;">
-                <div class="section-title">📍 Live Position</div>
-                <div id="position-container">
-                    <!-- Iron Condor Position -->
-                    <div id="ic-position" class="position-card" style="display: none;">
-                        <div class="position-header">
-                            <span class="position-strategy">🦅 IRON CONDOR <span id="ic-version-badge" style="font-size:0.65rem;background:#333;padding:2px 6px;border-radius:8px;margin-left:5px;">v2.0</span></span>
-                            <span class="position-pnl" id="ic-pnl">₹0</span>
-                        </div>
-                        <div class="position-details">
-                            <div class="position-row">
-                                <span>Entry Time:</span>
-                                <span id="ic-entry-time">--</span>
-                            </div>
-                            <div class="position-row">
-                                <span>Spot at Entry:</span>
-                                <span id="ic-spot-entry">--</span>
-                            </div>
-                            <div class="position-row">
-                                <span>Expiry:</span>
-                                <span id="ic-expiry">--</span>
-                            </div>
-                            <div class="position-row">
-                                <span>Quantity:</span>
-                                <span id="ic-qty">--</span>
-                            </div>
-                            <div class="position-row">
-                                <span>VIX at Entry:</span>
-                                <span id="ic-vix-entry">--</span>
-                            </div>
-                            <div class="position-row">
-                                <span>Strike Mode:</span>
-                                <span id="ic-strike-mode">--</span>
-                            </div>
-                        </div>
-                        <table class="position-table">
-                            <thead>
-                                <tr><th>Leg</th><th>Strike</th><th>Entry</th><th>Current</th><th>P&L</th></tr>
-                            </thead>
-                            <tbody id="ic-legs">
-                            </tbody>
-                        </table>
-                        <!-- Per-Spread P&L -->
-                        <div style="display:grid;grid-template-columns:1fr 1fr;gap:10px;margin-bottom:15px;">
-                            <div style="background:rgba(0,0,0,0.2);border-radius:8px;padding:10px;text-align:center;">
-                                <div style="font-size:0.7rem;color:#888;margin-bottom:4px;">📞 CALL SPREAD</div>
-                                <div id="ic-call-spread-pnl" style="font-size:1rem;font-weight:600;">--</div>
-                                <div id="ic-call-spread-status" style="font-size:0.65rem;color:#888;margin-top:2px;"></div>
-                            </div>
-                            <div style="background:rgba(0,0,0,0.2);border-radius:8px;padding:10px;text-align:center;">
-                                <div style="font-size:0.7rem;color:#888;margin-bottom:4px;">📱 PUT SPREAD</div>
-                                <div id="ic-put-spread-pnl" style="font-size:1rem;font-weight:600;">--</div>
-                                <div id="ic-put-spread-status" style="font-size:0.65rem;color:#888;margin-top:2px;"></div>
-                            </div>
-                        </div>
-                        <div class="position-summary">
-                            <div class="summary-item">
-                                <span>Entry Credit:</span>
-                                <span id="ic-entry-credit">₹0</span>
-                            </div>
-                            <div class="summary-item">
-                                <span>Current Premium:</span>
-                                <span id="ic-current-premium">₹0</span>
-                            </div>
-                            <div class="summary-item">
-                                <span>Unrealized P&L:</span>
-                                <span id="ic-unrealized-pnl" class="pnl-value">₹0</span>
-                            </div>
-                            <div class="summary-item">
-                                <span>P&L %:</span>
-                                <span id="ic-pnl-pct">0%</span>
-                            </div>
-                            <div class="summary-item">
-                                <span>Peak P&L %:</span>
-                                <span id="ic-peak-pnl" style="color:#00d2ff;">--</span>
-                            </div>
-                            <div class="summary-item">
-                                <span>Trail SL Level:</span>
-                                <span id="ic-trailing-sl-level" style="color:#ffa726;">--</span>
-                            </div>
-                        </div>
-                        <div class="position-progress">
-                            <div class="progress-bar">
-                                <div class="progress-fill" id="ic-progress"></div>
-                                <div class="progress-markers">
-                                    <span class="marker marker-sl">SL</span>
-                                    <span class="marker marker-entry">Entry</span>
-                                    <span class="marker marker-target">Target</span>
-                                </div>
-                            </div>
-                            <div class="progress-labels">
-                                <span id="ic-sl-label">-100%</span>
-                                <span id="ic-target-label">+50%</span>
-                            </div>
-                        </div>
-                        <!-- Adjustment Alert -->
-                        <div id="ic-adjustment-alert" style="display:none;margin-top:10px;padding:10px;border-radius:8px;background:rgba(255,167,38,0.15);border:1px solid rgba(255,167,38,0.3);font-size:0.85rem;color:#ffa726;">
-                            ⚙️ <span id="ic-adjustment-text"></span>
-                        </div>
-                    </div>
-                    
-                    <!-- Daily Scalp Position -->
-                    <div id="scalp-position" class="position-card" style="display: none;">
-                        <div class="position-header">
-                            <span class="position-strategy">⚡ DAILY SCALP <span style="font-size:0.65rem;background:#ff9800;padding:2px 6px;border-radius:8px;margin-left:5px;color:#000;">INTRADAY</span></span>
-                            <span class="position-pnl" id="scalp-pnl">₹0</span>
-                        </div>
-                        <div class="position-details">
-                            <div class="position-row">
-                                <span>Entry Time:</span>
-                                <span id="scalp-entry-time">--</span>
-                            </div>
-                            <div class="position-row">
-                                <span>Strike:</span>
-                                <span id="scalp-strike">--</span>
-                            </div>
-                            <div class="position-row">
-                                <span>Spot at Entry:</span>
-                                <span id="scalp-spot-entry">--</span>
-                            </div>
-                            <div class="position-row">
-                                <span>Expiry:</span>
-                                <span id="scalp-expiry">--</span>
-                            </div>
-                            <div class="position-row">
-                                <span>Quantity:</span>
-                                <span id="scalp-qty">--</span>
-                            </div>
-                            <div class="position-row">
-                                <span>VIX at Entry:</span>
-                                <span id="scalp-vix-entry">--</span>
-                            </div>
-                        </div>
-                        <table class="position-table">
-                            <thead>
-                                <tr><th>Leg</th><th>Entry</th><th>Current</th><th>P&L</th></tr>
-                            </thead>
-                            <tbody id="scalp-legs">
-                            </tbody>
-                        </table>
-                        <!-- Spot Movement Tracker -->
-                        <div style="display:grid;grid-template-columns:1fr 1fr;gap:10px;margin-bottom:15px;">
-                            <div style="background:rgba(0,0,0,0.2);border-radius:8px;padding:10px;text-align:center;">
-                                <div style="font-size:0.7rem;color:#888;margin-bottom:4px;">📍 SPOT MOVE</div>
-                                <div id="scalp-spot-move" style="font-size:1rem;font-weight:600;">0 pts</div>
-                                <div style="font-size:0.65rem;color:#888;margin-top:2px;">SL: ±<span id="scalp-spot-sl-display">150</span> pts</div>
-                            </div>
-                            <div style="background:rgba(0,0,0,0.2);border-radius:8px;padding:10px;text-align:center;">
-                                <div style="font-size:0.7rem;color:#888;margin-bottom:4px;">⏰ HARD EXIT</div>
-                                <div style="font-size:1rem;font-weight:600;color:#ff9800;">14:00</div>
-                                <div style="font-size:0.65rem;color:#888;margin-top:2px;">No overnight risk</div>
-                            </div>
-                        </div>
-                        <div class="position-summary">
-                            <div class="summary-item">
-                                <span>Entry Premium:</span>
-                                <span id="scalp-entry-premium">₹0</span>
-                            </div>
-                            <div class="summary-item">
-                                <span>Current Premium:</span>
-                                <span id="scalp-current-premium">₹0</span>
-                            </div>
-                            <div class="summary-item">
-                                <span>Unrealized P&L:</span>
-                                <span id="scalp-unrealized-pnl" class="pnl-value">₹0</span>
-                            </div>
-                            <div class="summary-item">
-                                <span>P&L %:</span>
-                                <span id="scalp-pnl-pct">0%</span>
-                            </div>
-                            <div class="summary-item">
-                                <span>Peak P&L %:</span>
-                                <span id="scalp-peak-pnl" style="color:#00d2ff;">--</span>
-                            </div>
-                            <div class="summary-item">
-                                <span>Trail SL Level:</span>
-                                <span id="scalp-trailing-sl-level" style="color:#ffa726;">--</span>
-                            </div>
-                        </div>
-                        <div class="position-progress">
-                            <div class="progress-bar">
-                                <div class="progress-fill" id="scalp-progress"></div>
-                                <div class="progress-markers">
-                                    <span class="marker marker-sl">SL</span>
-                                    <span class="marker marker-entry">Entry</span>
-                                    <span class="marker marker-target">Target</span>
-                                </div>
-                            </div>
-                            <div class="progress-labels">
-                                <span id="scalp-sl-label">-40%</span>
-                                <span id="scalp-target-label">+25%</span>
-                            </div>
-                        </div>
-                    </div>
-                    
-                    <!-- No Position -->
-                    <div id="no-position" class="no-position">
-                        <p>📭 No active positions</p>
-                        <p class="info-text">Positions will appear here when the bot takes a trade</p>
-                    </div>
-                </div>
-            </div>
-            
-            <div class="section">
-                <div class="section-title">📊 Select Strategy</div>
-                <div class="strategy-grid">
-                    <div class="strategy-btn active" data-strategy="iron_condor" onclick="selectStrategy('iron_condor')">
-                        <h4>🦅 Iron Condor</h4>
-                        <p>Limited risk • 65-70% win rate</p>
-                    </div>
-                    <div class="strategy-btn" data-strategy="daily_scalp" onclick="selectStrategy('daily_scalp')">
-                        <h4>⚡ Daily Scalp</h4>
-                        <p>Intraday ATM sell • No overnight</p>
-                    </div>
-                    <div class="strategy-btn" data-strategy="both" onclick="selectStrategy('both')">
-                        <h4>🔄 Both Strategies</h4>
-                        <p>IC + Daily Scalp together</p>
-                    </div>
-                </div>
-            </div>
-            
-            <div class="section">
-                <div class="section-title">🔑 Update Session Token</div>
-                <p class="info-text">Get token from ICICI Direct, or send /session TOKEN via Telegram</p>
-                <div class="session-input">
-                    <input type="text" id="session-token" placeholder="Paste session token here...">
-                    <button class="btn" onclick="updateSession()">Update</button>
-                </div>
-            </div>
-            
-            <div class="section">
-                <div class="section-title">🎮 Bot Controls</div>
-                <div style="display: flex; gap: 15px; flex-wrap: wrap;">
-                    <button class="btn btn-success" onclick="startBot()">▶️ Start Bot</button>
-                    <button class="btn btn-danger" onclick="stopBot()">⏹️ Stop Bot</button>
-                    <button class="btn" onclick="refreshData()">🔄 Refresh</button>
-                </div>
-            </div>
-            
-            <div class="section">
-                <div class="section-title">📈 P&L History</div>
-                <div class="chart-container">
-                    <canvas id="pnlChart"></canvas>
-                </div>
-            </div>
-            
-            <div class="section">
-                <div class="section-title">📋 Recent Trades</div>
-                <table>
-                    <thead>
-                        <tr><th>Date</th><th>Strategy</th><th>Entry</th><th>Exit</th><th>P&L</th><th>Reason</th></tr>
-                    </thead>
-                    <tbody id="trades-body">
-                        <tr><td colspan="6" style="text-align:center;color:#666;">No trades yet</td></tr>
-                    </tbody>
-                </table>
-            </div>
-        </div>
-        
-        <!-- BACKTESTING TAB -->
-        <div class="tab-content" id="tab-backtest">
-            <div class="section">
-                <div class="section-title">🔬 Run Backtest</div>
-                <p class="info-text" style="margin-bottom: 15px;">Uses same entry/exit times as live trading bot</p>
-                <div class="backtest-form">
-                    <div>
-                        <label class="info-text">Start Date</label>
-                        <input type="date" id="bt-start" value="2025-01-01">
-                    </div>
-                    <div>
-                        <label class="info-text">End Date</label>
-                        <input type="date" id="bt-end" value="2025-12-31">
-                    </div>
-                    <div>
-                        <label class="info-text">Strategy</label>
-                        <select id="bt-strategy">
-                            <option value="iron_condor">Iron Condor</option>
-                            <option value="daily_scalp">Daily Scalp</option>
-                            <option value="both">Both Strategies</option>
-                        </select>
-                    </div>
-                    <div>
-                        <label class="info-text">Initial Capital</label>
-                        <input type="number" id="bt-capital" value="500000">
-                    </div>
-                    <div>
-                        <label class="info-text">Entry Time Start</label>
-                        <input type="time" id="bt-entry-start" value="09:20">
-                    </div>
-                    <div>
-                        <label class="info-text">Entry Time End</label>
-                        <input type="time" id="bt-entry-end" value="14:00">
-                    </div>
-                    <div>
-                        <label class="info-text">Exit Time</label>
-                        <input type="time" id="bt-exit-time" value="15:15">
-                    </div>
-                    <div style="display: flex; align-items: center; gap: 10px;">
-                        <input type="checkbox" id="bt-use-api" style="width: 20px; height: 20px;">
-                        <label class="info-text" for="bt-use-api">Use Breeze API Historical Data</label>
-                    </div>
-                </div>
-                <div style="margin-bottom: 15px;">
-                    <button class="btn btn-warning" onclick="runBacktest()" id="bt-run-btn">🚀 Run Backtest</button>
-                    <span id="bt-loading" style="display:none; margin-left: 15px;">⏳ Running backtest...</span>
-                </div>
-                <p class="info-text" id="bt-data-note">💡 Premiums are estimated using Black-Scholes approximation. Enable "Use Breeze API" for real historical data (slower, requires API connection).</p>
-                
-                <div class="backtest-results" id="bt-results">
-                    <h3 style="margin-bottom: 15px;">📊 Backtest Results</h3>
-                    
-                    <!-- Data Source & Timing Info -->
-                    <div style="background: rgba(0,0,0,0.2); padding: 12px; border-radius: 8px; margin-bottom: 15px;">
-                        <div style="margin-bottom: 8px;">
-                            <span class="info-text">📊 Data Source: <strong id="bt-data-source">Estimated</strong></span>
-                            <span class="info-text" style="margin-left: 20px;">💰 Avg Premium: <strong id="bt-avg-premium">₹0</strong></span>
-                        </div>
-                        <div>
-                            <span class="info-text">⏰ Entry: <strong id="bt-timing-entry">09:20 - 14:00</strong></span>
-                            <span class="info-text" style="margin-left: 20px;">🚪 Exit: <strong id="bt-timing-exit">15:15</strong></span>
-                            <span class="info-text" style="margin-left: 20px;">📦 Qty: <strong id="bt-timing-qty">75</strong></span>
-                        </div>
-                    </div>
-                    
-                    <!-- Summary Grid -->
-                    <div class="result-grid">
-                        <div class="result-item">
-                            <div class="result-value" id="bt-trades">0</div>
-                            <div class="result-label">Total Trades</div>
-                        </div>
-                        <div class="result-item">
-                            <div class="result-value" id="bt-winrate">0%</div>
-                            <div class="result-label">Win Rate</div>
-                        </div>
-                        <div class="result-item">
-                            <div class="result-value positive" id="bt-pnl">₹0</div>
-                            <div class="result-label">Total P&L</div>
-                        </div>
-                        <div class="result-item">
-                            <div class="result-value" id="bt-return">0%</div>
-                            <div class="result-label">Return %</div>
-                        </div>
-                        <div class="result-item">
-                            <div class="result-value" id="bt-expiries">0</div>
-                            <div class="result-label">Expiries</div>
-                        </div>
-                        <div class="result-item">
-                            <div class="result-value" id="bt-avg-exit">--:--</div>
-                            <div class="result-label">Avg Exit Time</div>
-                        </div>
-                    </div>
-                    
-                    <!-- Exit Breakdown -->
-                    <div style="margin-top: 20px;">
-                        <h4 style="margin-bottom: 10px; color: #00d2ff;">📈 Exit Breakdown</h4>
-                        <div class="result-grid" style="grid-template-columns: repeat(3, 1fr);">
-                            <div class="result-item">
-                                <div class="result-value positive" id="bt-target-exits">0</div>
-                                <div class="result-label">🎯 Target Hits</div>
-                            </div>
-                            <div class="result-item">
-                                <div class="result-value negative" id="bt-sl-exits">0</div>
-                                <div class="result-label">🛑 Stop Loss</div>
-                            </div>
-                            <div class="result-item">
-                                <div class="result-value" id="bt-time-exits">0</div>
-                                <div class="result-label">⏰ Time Exits</div>
-                            </div>
-                        </div>
-                    </div>
-                    
-                    <!-- Trades Table -->
-                    <div style="margin-top: 20px;">
-                        <h4 style="margin-bottom: 10px; color: #00d2ff;">📋 Trade Details <span class="info-text" id="bt-trade-count">(0 trades)</span></h4>
-                        <div style="max-height: 400px; overflow-y: auto;">
-                            <table>
-                                <thead>
-                                    <tr>
-                                        <th>Date</th>
-                                        <th>Strategy</th>
-                                        <th>Entry Time</th>
-                                        <th>Exit Time</th>
-                                        <th>Premium</th>
-                                        <th>P&L</th>
-                                        <th>Exit Reason</th>
-                                    </tr>
-                                </thead>
-                                <tbody id="bt-trades-body">
-                                    <tr><td colspan="7" style="text-align:center;color:#666;">Run backtest to see trades</td></tr>
-                                </tbody>
-                            </table>
-                        </div>
-                    </div>
-                </div>
-            </div>
-        </div>
-        
-        <!-- TRADE HISTORY TAB -->
-        <div class="tab-content" id="tab-history">
-            <div class="section">
-                <div class="section-title">📜 Complete Trade History</div>
-                <table>
-                    <thead>
-                        <tr><th>Date</th><th>Strategy</th><th>Entry</th><th>Exit</th><th>P&L</th><th>Reason</th></tr>
-                    </thead>
-                    <tbody id="history-body">
-                        <tr><td colspan="6" style="text-align:center;color:#666;">Loading...</td></tr>
-                    </tbody>
-                </table>
-            </div>
-        </div>
-        
-        <div style="text-align:center; color:#555; margin-top:30px;">
-            <p id="footer-info">Lot Size: 75 | Market: 9:15 AM - 3:30 PM IST</p>
-        </div>
-    </div>
+DASHBOARD_TEMPLATE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "templates", "dashboard.html")
+
+# Read once at import; the minify/compress pipeline below works from this string
+with open(DASHBOARD_TEMPLATE, encoding="utf-8") as f:
+    DASHBOARD_HTML = f.read()
+
+# ============================================
+# DASHBOARD ASSETS (minified + pre-compressed at import)
+# ============================================
+BROTLI_AVAILABLE = False
+try:
+    import brotli
+    BROTLI_AVAILABLE = True
+except:
+    pass
+
+_HTML_COMMENT_RE = re.compile(r'<!--.*?-->', re.S)
+_BLOCK_COMMENT_RE = re.compile(r'/\*.*?\*/', re.S)
+
+def minify_html(raw: str) -> str:
+    """Conservative import-time minifier for the inline dashboard.
     
-    <script>
-        let pnlChart;
-        
-        function showTab(tab) {
-            document.querySelectorAll('.tab').forEach(t => t.classList.remove('active'));
-            document.querySelectorAll('.tab-content').forEach(t => t.classList.remove('active'));
-            document.querySelector(`.tab:nth-child(${tab === 'live' ? 1 : tab === 'backtest' ? 2 : 3})`).classList.add('active');
-            document.getElementById('tab-' + tab).classList.add('active');
-            
-            if (tab === 'history') loadHistory();
-        }
-        
-        function initChart() {
-            const ctx = document.getElementById('pnlChart').getContext('2d');
-            pnlChart = new Chart(ctx, {
-                type: 'line',
-                data: { labels: [], datasets: [{ label: 'P&L', data: [], borderColor: '#00d2ff', fill: true, tension: 0.4 }] },
-                options: { responsive: true, maintainAspectRatio: false, plugins: { legend: { display: false } } }
-            });
-        }
-        
-        async function refreshData() {
-            try {
-                const res = await fetch('/api/summary');
-                const data = await res.json();
-                
-                document.getElementById('strategy-badge').textContent = (data.strategy || 'iron_condor').toUpperCase().replace('_', ' ');
-                
-                const botBadge = document.getElementById('bot-badge');
-                botBadge.textContent = data.bot_running ? '🟢 RUNNING' : '⏸️ STOPPED';
-                botBadge.className = 'badge ' + (data.bot_running ? 'badge-online' : 'badge-offline');
-                
-                const sessionBadge = document.getElementById('session-badge');
-                sessionBadge.textContent = data.session_set ? '🔑 SESSION OK' : '🔑 NO SESSION';
-                sessionBadge.className = 'badge badge-session' + (data.session_set ? ' active' : '');
-                
-                const pnl = data.total_pnl || 0;
-                document.getElementById('total-pnl').textContent = '₹' + pnl.toLocaleString('en-IN');
-                document.getElementById('total-pnl').className = 'card-value ' + (pnl >= 0 ? 'positive' : 'negative');
-                
-                document.getElementById('daily-pnl').textContent = '₹' + (data.daily_pnl || 0).toLocaleString('en-IN');
-                document.getElementById('win-rate').textContent = data.win_rate.toFixed(1) + '%';
-                document.getElementById('portfolio').textContent = '₹' + data.current_value.toLocaleString('en-IN');
-                
-                document.querySelectorAll('.strategy-btn').forEach(btn => {
-                    btn.classList.toggle('active', btn.dataset.strategy === data.strategy);
-                });
-                
-                // Fetch status for timing info
-                const statusRes = await fetch('/api/status');
-                const status = await statusRes.json();
-                
-                // Update time badge
-                const timeBadge = document.getElementById('time-badge');
-                timeBadge.textContent = '🕐 ' + status.current_time_ist.split(' ')[1] + ' IST';
-                
-                // Update market badge
-                const marketBadge = document.getElementById('market-badge');
-                if (status.is_market_hours) {
-                    marketBadge.textContent = '📊 MARKET OPEN';
-                    marketBadge.style.background = '#00c853';
-                } else {
-                    marketBadge.textContent = '📊 MARKET CLOSED';
-                    marketBadge.style.background = '#666';
-                }
-                
-                // Update window badge
-                const windowBadge = document.getElementById('window-badge');
-                if (status.is_exit_time) {
-                    windowBadge.textContent = '🔴 EXIT TIME';
-                    windowBadge.style.background = '#ff5252';
-                } else if (status.is_trading_time) {
-                    windowBadge.textContent = '🟢 ENTRY WINDOW (' + status.entry_time_start + '-' + status.entry_time_end + ')';
-                    windowBadge.style.background = '#00c853';
-                } else {
-                    windowBadge.textContent = '⏳ WAITING (Entry: ' + status.entry_time_start + ')';
-                    windowBadge.style.background = '#ff9800';
-                }
-                
-                // Update expiry badge
-                const expiryBadge = document.getElementById('expiry-badge');
-                expiryBadge.textContent = '📅 Expiry: ' + status.next_expiry + ' (' + status.next_expiry_day.slice(0,3) + ')';
-                if (status.custom_expiry) {
-                    expiryBadge.style.background = '#e91e63';  // Pink for custom expiry
-                } else {
-                    expiryBadge.style.background = '#9c27b0';  // Purple for normal
-                }
-                
-                // Update footer
-                document.getElementById('footer-info').textContent = 
-                    'Lot Size: ' + status.lot_size + ' × ' + status.num_lots + ' = ' + status.quantity + 
-                    ' | Min Premium: ₹' + status.min_premium + 
-                    ' | Market: 9:15 AM - 3:30 PM IST';
-                
-                // Fetch and update live positions
-                const posRes = await fetch('/api/position');
-                const posData = await posRes.json();
-                updatePositions(posData);
-                
-                const tradesRes = await fetch('/api/trades');
-                const trades = await tradesRes.json();
-                updateTable(trades);
-                updateChart(trades);
-            } catch (e) { console.error(e); }
-        }
-        
-        function updatePositions(posData) {
-            const section = document.getElementById('position-section');
-            const icPos = document.getElementById('ic-position');
-            const scalpPos = document.getElementById('scalp-position');
-            const noPos = document.getElementById('no-position');
-            
-            // Always show position section
-            section.style.display = 'block';
-            
-            if (!posData.has_position) {
-                icPos.style.display = 'none';
-                scalpPos.style.display = 'none';
-                noPos.style.display = 'block';
-                return;
-            }
-            
-            noPos.style.display = 'none';
-            
-            // Iron Condor Position
-            if (posData.iron_condor) {
-                icPos.style.display = 'block';
-                const ic = posData.iron_condor;
-                
-                // Entry details
-                document.getElementById('ic-entry-time').textContent = ic.entry_time ? new Date(ic.entry_time).toLocaleTimeString('en-IN') : '--';
-                document.getElementById('ic-spot-entry').textContent = ic.spot_at_entry ? ic.spot_at_entry.toFixed(2) : '--';
-                document.getElementById('ic-expiry').textContent = ic.expiry || '--';
-                document.getElementById('ic-qty').textContent = ic.quantity + ' (' + ic.num_lots + ' lots)';
-                document.getElementById('ic-vix-entry').textContent = ic.vix_at_entry ? ic.vix_at_entry.toFixed(1) : 'N/A';
-                document.getElementById('ic-strike-mode').textContent = (ic.strike_mode || 'fixed').toUpperCase();
-                
-                // Calculate P&L from entry prices (static display)
-                const entryCredit = ic.entry_premium || 0;
-                document.getElementById('ic-entry-credit').textContent = '₹' + entryCredit.toFixed(2);
-                
-                // Show adjustment status
-                const adjAlert = document.getElementById('ic-adjustment-alert');
-                if (ic.call_spread_closed) {
-                    adjAlert.style.display = 'block';
-                    document.getElementById('ic-adjustment-text').textContent = 'Call spread closed (adjustment). Put spread still active.';
-                } else if (ic.put_spread_closed) {
-                    adjAlert.style.display = 'block';
-                    document.getElementById('ic-adjustment-text').textContent = 'Put spread closed (adjustment). Call spread still active.';
-                } else {
-                    adjAlert.style.display = 'none';
-                }
-                
-                // Legs table
-                const strikes = ic.strikes || {};
-                const entryPrices = ic.entry_prices || {};
-                document.getElementById('ic-legs').innerHTML = `
-                    <tr>
-                        <td style="color:#ff5252;">SELL CALL</td>
-                        <td>${strikes.sell_call || '--'}</td>
-                        <td>₹${(entryPrices.sc || 0).toFixed(2)}</td>
-                        <td id="ic-sc-ltp">--</td>
-                        <td id="ic-sc-pnl">--</td>
-                    </tr>
-                    <tr>
-                        <td style="color:#00c853;">BUY CALL</td>
-                        <td>${strikes.buy_call || '--'}</td>
-                        <td>₹${(entryPrices.bc || 0).toFixed(2)}</td>
-                        <td id="ic-bc-ltp">--</td>
-                        <td id="ic-bc-pnl">--</td>
-                    </tr>
-                    <tr>
-                        <td style="color:#ff5252;">SELL PUT</td>
-                        <td>${strikes.sell_put || '--'}</td>
-                        <td>₹${(entryPrices.sp || 0).toFixed(2)}</td>
-                        <td id="ic-sp-ltp">--</td>
-                        <td id="ic-sp-pnl">--</td>
-                    </tr>
-                    <tr>
-                        <td style="color:#00c853;">BUY PUT</td>
-                        <td>${strikes.buy_put || '--'}</td>
-                        <td>₹${(entryPrices.bp || 0).toFixed(2)}</td>
-                        <td id="ic-bp-ltp">--</td>
-                        <td id="ic-bp-pnl">--</td>
-                    </tr>
-                `;
-                
-                // Fetch live P&L
-                fetchLivePnl('iron_condor');
-            } else {
-                icPos.style.display = 'none';
-            }
-            
-            // Daily Scalp Position
-            if (posData.daily_scalp) {
-                scalpPos.style.display = 'block';
-                const sc = posData.daily_scalp;
-                
-                // Entry details
-                document.getElementById('scalp-entry-time').textContent = sc.entry_time ? new Date(sc.entry_time).toLocaleTimeString('en-IN') : '--';
-                document.getElementById('scalp-strike').textContent = sc.strike || '--';
-                document.getElementById('scalp-spot-entry').textContent = sc.spot_at_entry ? sc.spot_at_entry.toFixed(2) : '--';
-                document.getElementById('scalp-expiry').textContent = sc.expiry || '--';
-                document.getElementById('scalp-qty').textContent = sc.quantity + ' (' + sc.num_lots + ' lots)';
-                document.getElementById('scalp-vix-entry').textContent = sc.vix_at_entry ? sc.vix_at_entry.toFixed(1) : 'N/A';
-                
-                // Entry premium
-                const entryPremium = sc.entry_premium || 0;
-                document.getElementById('scalp-entry-premium').textContent = '₹' + entryPremium.toFixed(2);
-                
-                // Legs table
-                const entryPrices = sc.entry_prices || {};
-                document.getElementById('scalp-legs').innerHTML = `
-                    <tr>
-                        <td style="color:#ff5252;">SELL ${sc.strike} CE</td>
-                        <td>₹${(entryPrices.ce || 0).toFixed(2)}</td>
-                        <td id="scalp-ce-ltp">--</td>
-                        <td id="scalp-ce-pnl">--</td>
-                    </tr>
-                    <tr>
-                        <td style="color:#ff5252;">SELL ${sc.strike} PE</td>
-                        <td>₹${(entryPrices.pe || 0).toFixed(2)}</td>
-                        <td id="scalp-pe-ltp">--</td>
-                        <td id="scalp-pe-pnl">--</td>
-                    </tr>
-                `;
-                
-                // Fetch live P&L
-                fetchLivePnl('daily_scalp');
-            } else {
-                scalpPos.style.display = 'none';
-            }
-        }
-        
-        async function fetchLivePnl(strategy) {
-            try {
-                const res = await fetch('/api/live_pnl?strategy=' + strategy);
-                const data = await res.json();
-                
-                if (strategy === 'iron_condor' && data.iron_condor) {
-                    const ic = data.iron_condor;
-                    const pnl = ic.pnl_amount || 0;
-                    const pnlPct = ic.pnl_percent || 0;
-                    
-                    // Update header P&L
-                    const pnlEl = document.getElementById('ic-pnl');
-                    pnlEl.textContent = '₹' + pnl.toLocaleString('en-IN', {maximumFractionDigits: 0});
-                    pnlEl.className = 'position-pnl ' + (pnl >= 0 ? 'positive' : 'negative');
-                    
-                    // Update current premium
-                    document.getElementById('ic-current-premium').textContent = '₹' + (ic.current_premium || 0).toFixed(2);
-                    
-                    // Update unrealized P&L
-                    const unrealizedEl = document.getElementById('ic-unrealized-pnl');
-                    unrealizedEl.textContent = '₹' + pnl.toLocaleString('en-IN', {maximumFractionDigits: 0});
-                    unrealizedEl.className = 'pnl-value ' + (pnl >= 0 ? 'positive' : 'negative');
-                    
-                    // Update P&L %
-                    document.getElementById('ic-pnl-pct').textContent = (pnl >= 0 ? '+' : '') + pnlPct.toFixed(1) + '%';
-                    
-                    // Update per-spread P&L
-                    const callPnlPct = ic.call_spread_pnl_pct || 0;
-                    const putPnlPct = ic.put_spread_pnl_pct || 0;
-                    const callSpreadEl = document.getElementById('ic-call-spread-pnl');
-                    const putSpreadEl = document.getElementById('ic-put-spread-pnl');
-                    
-                    if (ic.call_spread_closed) {
-                        callSpreadEl.textContent = 'CLOSED';
-                        callSpreadEl.style.color = '#888';
-                        document.getElementById('ic-call-spread-status').textContent = '(adjusted)';
-                    } else {
-                        callSpreadEl.textContent = (callPnlPct >= 0 ? '+' : '') + callPnlPct.toFixed(1) + '%';
-                        callSpreadEl.style.color = callPnlPct >= 0 ? '#00c853' : '#ff5252';
-                        document.getElementById('ic-call-spread-status').textContent = '';
-                    }
-                    
-                    if (ic.put_spread_closed) {
-                        putSpreadEl.textContent = 'CLOSED';
-                        putSpreadEl.style.color = '#888';
-                        document.getElementById('ic-put-spread-status').textContent = '(adjusted)';
-                    } else {
-                        putSpreadEl.textContent = (putPnlPct >= 0 ? '+' : '') + putPnlPct.toFixed(1) + '%';
-                        putSpreadEl.style.color = putPnlPct >= 0 ? '#00c853' : '#ff5252';
-                        document.getElementById('ic-put-spread-status').textContent = '';
-                    }
-                    
-                    // Update peak P&L and trailing SL level
-                    const peakPnl = ic.peak_pnl_pct || 0;
-                    document.getElementById('ic-peak-pnl').textContent = '+' + peakPnl.toFixed(1) + '%';
-                    
-                    const trailActivate = ic.target_pct ? Math.min(ic.target_pct, 30) : 30;
-                    if (peakPnl >= trailActivate) {
-                        const trailLevel = peakPnl - 15; // IC_TRAILING_OFFSET_PCT default
-                        document.getElementById('ic-trailing-sl-level').textContent = '+' + trailLevel.toFixed(1) + '% ✓';
-                        document.getElementById('ic-trailing-sl-level').style.color = '#ffa726';
-                    } else {
-                        document.getElementById('ic-trailing-sl-level').textContent = 'Not active';
-                        document.getElementById('ic-trailing-sl-level').style.color = '#666';
-                    }
-                    
-                    // Update current prices in table
-                    if (ic.current_prices) {
-                        const cp = ic.current_prices;
-                        document.getElementById('ic-sc-ltp').textContent = '₹' + (cp.sc || 0).toFixed(2);
-                        document.getElementById('ic-bc-ltp').textContent = '₹' + (cp.bc || 0).toFixed(2);
-                        document.getElementById('ic-sp-ltp').textContent = '₹' + (cp.sp || 0).toFixed(2);
-                        document.getElementById('ic-bp-ltp').textContent = '₹' + (cp.bp || 0).toFixed(2);
-                    }
-                    
-                    // Update progress bar (map -100% to +50% -> 0% to 100%)
-                    const progress = document.getElementById('ic-progress');
-                    const progressPct = Math.min(100, Math.max(0, ((pnlPct + ic.stoploss_pct) / (ic.target_pct + ic.stoploss_pct)) * 100));
-                    progress.style.left = progressPct + '%';
-                    
-                    // Update labels
-                    document.getElementById('ic-sl-label').textContent = '-' + ic.stoploss_pct + '%';
-                    document.getElementById('ic-target-label').textContent = '+' + ic.target_pct + '%';
-                }
-                
-                if (strategy === 'daily_scalp' && data.daily_scalp) {
-                    const sc = data.daily_scalp;
-                    const pnl = sc.pnl_amount || 0;
-                    const pnlPct = sc.pnl_percent || 0;
-                    
-                    // Update header P&L
-                    const pnlEl = document.getElementById('scalp-pnl');
-                    pnlEl.textContent = '₹' + pnl.toLocaleString('en-IN', {maximumFractionDigits: 0});
-                    pnlEl.className = 'position-pnl ' + (pnl >= 0 ? 'positive' : 'negative');
-                    
-                    // Update current premium
-                    document.getElementById('scalp-current-premium').textContent = '₹' + (sc.current_premium || 0).toFixed(2);
-                    
-                    // Update unrealized P&L
-                    const unrealizedEl = document.getElementById('scalp-unrealized-pnl');
-                    unrealizedEl.textContent = '₹' + pnl.toLocaleString('en-IN', {maximumFractionDigits: 0});
-                    unrealizedEl.className = 'pnl-value ' + (pnl >= 0 ? 'positive' : 'negative');
-                    
-                    // Update P&L %
-                    document.getElementById('scalp-pnl-pct').textContent = (pnl >= 0 ? '+' : '') + pnlPct.toFixed(1) + '%';
-                    
-                    // Update spot movement
-                    const spotMove = sc.spot_move || 0;
-                    const spotMoveEl = document.getElementById('scalp-spot-move');
-                    spotMoveEl.textContent = (spotMove >= 0 ? '+' : '') + spotMove.toFixed(0) + ' pts';
-                    spotMoveEl.style.color = Math.abs(spotMove) > (sc.spot_sl_points || 150) * 0.7 ? '#ff5252' : (Math.abs(spotMove) > (sc.spot_sl_points || 150) * 0.5 ? '#ffa726' : '#00c853');
-                    document.getElementById('scalp-spot-sl-display').textContent = sc.spot_sl_points || 150;
-                    
-                    // Update peak P&L and trailing SL
-                    const peakPnl = sc.peak_pnl_pct || 0;
-                    document.getElementById('scalp-peak-pnl').textContent = '+' + peakPnl.toFixed(1) + '%';
-                    
-                    if (peakPnl >= 15) {  // SCALP_TRAIL_ACTIVATE_PCT default
-                        const trailLevel = peakPnl - 10; // SCALP_TRAIL_OFFSET_PCT default
-                        document.getElementById('scalp-trailing-sl-level').textContent = '+' + trailLevel.toFixed(1) + '% ✓';
-                        document.getElementById('scalp-trailing-sl-level').style.color = '#ffa726';
-                    } else {
-                        document.getElementById('scalp-trailing-sl-level').textContent = 'Not active';
-                        document.getElementById('scalp-trailing-sl-level').style.color = '#666';
-                    }
-                    
-                    // Update current prices in table
-                    if (sc.current_prices) {
-                        document.getElementById('scalp-ce-ltp').textContent = '₹' + (sc.current_prices.ce || 0).toFixed(2);
-                        document.getElementById('scalp-pe-ltp').textContent = '₹' + (sc.current_prices.pe || 0).toFixed(2);
-                    }
-                    
-                    // Update progress bar
-                    const progress = document.getElementById('scalp-progress');
-                    const progressPct = Math.min(100, Math.max(0, ((pnlPct + sc.stoploss_pct) / (sc.target_pct + sc.stoploss_pct)) * 100));
-                    progress.style.left = progressPct + '%';
-                    
-                    // Update labels
-                    document.getElementById('scalp-sl-label').textContent = '-' + sc.stoploss_pct + '%';
-                    document.getElementById('scalp-target-label').textContent = '+' + sc.target_pct + '%';
-                }
-            } catch (e) {
-                console.error('Error fetching live P&L:', e);
-            }
-        }
-        
-        function updateTable(trades) {
-            const tbody = document.getElementById('trades-body');
-            if (!trades.length) {
-                tbody.innerHTML = '<tr><td colspan="6" style="text-align:center;color:#666;">No trades yet</td></tr>';
-                return;
-            }
-            tbody.innerHTML = trades.slice(-10).reverse().map(t => {
-                const pnl = parseFloat(t.pnl || 0);
-                return `<tr>
-                    <td>${t.date || '-'}</td>
-                    <td>${(t.strategy || '-').replace('_', ' ')}</td>
-                    <td>₹${parseFloat(t.entry_premium || 0).toFixed(0)}</td>
-                    <td>₹${parseFloat(t.exit_premium || 0).toFixed(0)}</td>
-                    <td class="${pnl >= 0 ? 'positive' : 'negative'}">₹${pnl.toLocaleString('en-IN')}</td>
-                    <td>${t.exit_reason || '-'}</td>
-                </tr>`;
-            }).join('');
-        }
-        
-        function updateChart(trades) {
-            if (!trades.length) return;
-            let cum = 0;
-            pnlChart.data.labels = trades.map(t => t.date || '');
-            pnlChart.data.datasets[0].data = trades.map(t => { cum += parseFloat(t.pnl || 0); return cum; });
-            pnlChart.update();
-        }
-        
-        async function selectStrategy(s) {
-            await fetch('/api/strategy', { method: 'POST', headers: { 'Content-Type': 'application/json' }, body: JSON.stringify({ strategy: s }) });
-            refreshData();
-        }
-        
-        async function updateSession() {
-            const token = document.getElementById('session-token').value.trim();
-            if (!token) return alert('Enter token');
-            await fetch('/api/session', { method: 'POST', headers: { 'Content-Type': 'application/json' }, body: JSON.stringify({ token }) });
-            document.getElementById('session-token').value = '';
-            refreshData();
-            alert('Session updated!');
-        }
-        
-        async function startBot() {
-            await fetch('/api/bot/start', { method: 'POST' });
-            refreshData();
-        }
-        
-        async function stopBot() {
-            await fetch('/api/bot/stop', { method: 'POST' });
-            refreshData();
-        }
-        
-        async function runBacktest() {
-            const start = document.getElementById('bt-start').value;
-            const end = document.getElementById('bt-end').value;
-            const strategy = document.getElementById('bt-strategy').value;
-            const capital = document.getElementById('bt-capital').value;
-            const entryStart = document.getElementById('bt-entry-start').value;
-            const entryEnd = document.getElementById('bt-entry-end').value;
-            const exitTime = document.getElementById('bt-exit-time').value;
-            const useHistoricalApi = document.getElementById('bt-use-api').checked;
-            
-            // Show loading
-            document.getElementById('bt-run-btn').disabled = true;
-            document.getElementById('bt-loading').style.display = 'inline';
-            if (useHistoricalApi) {
-                document.getElementById('bt-loading').textContent = '⏳ Fetching historical data from Breeze API (this may take a while)...';
-            } else {
-                document.getElementById('bt-loading').textContent = '⏳ Running backtest...';
-            }
-            
-            try {
-                const res = await fetch('/api/backtest', {
-                    method: 'POST',
-                    headers: { 'Content-Type': 'application/json' },
-                    body: JSON.stringify({ 
-                        start_date: start, 
-                        end_date: end, 
-                        strategy, 
-                        capital: parseFloat(capital),
-                        entry_time_start: entryStart,
-                        entry_time_end: entryEnd,
-                        exit_time: exitTime,
-                        use_historical_api: useHistoricalApi
-                    })
-                });
-                const data = await res.json();
-                
-                // Summary stats
-                document.getElementById('bt-trades').textContent = data.total_trades || 0;
-                document.getElementById('bt-winrate').textContent = (data.win_rate || 0).toFixed(1) + '%';
-                document.getElementById('bt-pnl').textContent = '₹' + (data.total_pnl || 0).toLocaleString('en-IN');
-                document.getElementById('bt-pnl').className = 'result-value ' + ((data.total_pnl || 0) >= 0 ? 'positive' : 'negative');
-                document.getElementById('bt-return').textContent = (data.return_pct || 0).toFixed(2) + '%';
-                document.getElementById('bt-expiries').textContent = data.expiries_found || 0;
-                document.getElementById('bt-avg-exit').textContent = data.avg_exit_time || '--:--';
-                
-                // Data source info
-                const dataSource = data.data_source || {};
-                let sourceText = 'Estimated';
-                if (dataSource.use_historical_api) {
-                    sourceText = `API: ${dataSource.api_data || 0}, Est: ${dataSource.estimated_data || 0}`;
-                }
-                document.getElementById('bt-data-source').textContent = sourceText;
-                document.getElementById('bt-avg-premium').textContent = '₹' + (data.avg_premium || 0).toFixed(2);
-                
-                // Timing info
-                document.getElementById('bt-timing-entry').textContent = (data.entry_time_start || entryStart) + ' - ' + (data.entry_time_end || entryEnd);
-                document.getElementById('bt-timing-exit').textContent = data.exit_time || exitTime;
-                document.getElementById('bt-timing-qty').textContent = data.quantity || 75;
-                
-                // Exit breakdown
-                const exits = data.exit_breakdown || {};
-                document.getElementById('bt-target-exits').textContent = exits.target || 0;
-                document.getElementById('bt-sl-exits').textContent = exits.stop_loss || 0;
-                document.getElementById('bt-time-exits').textContent = exits.time_exit || 0;
-                
-                // Trades table
-                const trades = data.trades || [];
-                document.getElementById('bt-trade-count').textContent = '(' + trades.length + ' trades)';
-                
-                const tbody = document.getElementById('bt-trades-body');
-                if (!trades.length) {
-                    tbody.innerHTML = '<tr><td colspan="7" style="text-align:center;color:#666;">No trades</td></tr>';
-                } else {
-                    tbody.innerHTML = trades.map(t => {
-                        const pnl = parseFloat(t.pnl || 0);
-                        const premium = t.credit || t.total_premium || 0;
-                        const strategyName = (t.strategy || '').replace('_', ' ');
-                        const exitClass = t.exit_reason === 'TARGET' ? 'positive' : 
-                                         t.exit_reason === 'STOP_LOSS' ? 'negative' : '';
-                        const dataIcon = t.data_source === 'API' ? '📡' : '📊';
-                        return `<tr>
-                            <td>${t.entry_date || '-'}</td>
-                            <td>${strategyName}</td>
-                            <td>${t.entry_time || '-'}</td>
-                            <td>${t.exit_time || '-'}</td>
-                            <td>${dataIcon} ₹${parseFloat(premium).toFixed(2)}</td>
-                            <td class="${pnl >= 0 ? 'positive' : 'negative'}">₹${pnl.toLocaleString('en-IN', {maximumFractionDigits: 0})}</td>
-                            <td class="${exitClass}">${t.exit_reason || '-'}</td>
-                        </tr>`;
-                    }).join('');
-                }
-                
-                document.getElementById('bt-results').classList.add('show');
-            } catch (e) {
-                console.error(e);
-                alert('Backtest failed: ' + e.message);
-            } finally {
-                document.getElementById('bt-run-btn').disabled = false;
-                document.getElementById('bt-loading').style.display = 'none';
-            }
-        }
-        
-        async function loadHistory() {
-            try {
-                const res = await fetch('/api/history');
-                const data = await res.json();
-                const tbody = document.getElementById('history-body');
-                
-                const trades = data.trades || [];
-                if (!trades.length) {
-                    tbody.innerHTML = '<tr><td colspan="6" style="text-align:center;color:#666;">No trade history</td></tr>';
-                    return;
-                }
-                
-                tbody.innerHTML = trades.reverse().map(t => {
-                    const pnl = parseFloat(t.pnl || 0);
-                    return `<tr>
-                        <td>${t.date || t.entry_date || '-'}</td>
-                        <td>${(t.strategy || '-').replace('_', ' ')}</td>
-                        <td>₹${parseFloat(t.entry_premium || t.credit || t.total_premium || 0).toFixed(0)}</td>
-                        <td>₹${parseFloat(t.exit_premium || 0).toFixed(0)}</td>
-                        <td class="${pnl >= 0 ? 'positive' : 'negative'}">₹${pnl.toLocaleString('en-IN')}</td>
-                        <td>${t.exit_reason || '-'}</td>
-                    </tr>`;
-                }).join('');
-            } catch (e) {
-                console.error(e);
-            }
-        }
-        
-        async function initBacktestForm() {
-            // Load bot settings to populate backtest form with same values
-            try {
-                const res = await fetch('/api/status');
-                const status = await res.json();
-                
-                if (status.entry_time_start) {
-                    document.getElementById('bt-entry-start').value = status.entry_time_start;
-                }
-                if (status.entry_time_end) {
-                    document.getElementById('bt-entry-end').value = status.entry_time_end;
-                }
-                if (status.exit_time) {
-                    document.getElementById('bt-exit-time').value = status.exit_time;
-                }
-            } catch (e) {
-                console.error('Error loading bot settings for backtest:', e);
-            }
+    Drops HTML and /* */ comments, whole-line // comments, indentation and
+    blank lines. Line breaks are kept so JS automatic semicolon insertion
+    behaves exactly as in the source.
+    """
+    text = _HTML_COMMENT_RE.sub('', raw)
+    text = _BLOCK_COMMENT_RE.sub('', text)
+    lines = []
+    for line in text.splitlines():
+        line = line.strip()
+        if line and not line.startswith('//'):
+            lines.append(line)
+    return '\n'.join(lines)
+
+# Assets are built once per process, so the import time is their Last-Modified
+_ASSETS_BUILT_AT = datetime.now(timezone.utc).replace(microsecond=0)
+
+class PrecompressedAsset:
+    """A static body compressed once at import and served with ETag/304 support"""
+    
+    def __init__(self, body: bytes, mimetype: str, cache_control: str):
+        self.mimetype = mimetype
+        self.cache_control = cache_control
+        self.last_modified = _ASSETS_BUILT_AT
+        self.digest = hashlib.sha256(body).hexdigest()[:16]
+        self.variants = {
+            "identity": body,
+            "gzip": gzip.compress(body, compresslevel=9, mtime=0)
         }
-        
-        initChart();
-        refreshData();
-        initBacktestForm();
-        setInterval(refreshData, 15000);  // Refresh every 15 seconds to reduce API load
-    </script>
-</body>
-</html>
-"""
+        if BROTLI_AVAILABLE:
+            self.variants["br"] = brotli.compress(body, quality=11)
+    
+    def _pick_encoding(self) -> str:
+        """Best variant the client accepts (br > gzip > identity)"""
+        accepted = request.accept_encodings
+        for candidate in ("br", "gzip"):
+            if candidate in self.variants and accepted[candidate]:
+                return candidate
+        return "identity"
+    
+    def response(self) -> Response:
+        encoding = self._pick_encoding()
+        # Each encoding is a distinct representation, so it gets its own strong ETag
+        etag = self.digest if encoding == "identity" else f"{self.digest}-{encoding}"
+        
+        response = Response(self.variants[encoding], mimetype=self.mimetype)
+        if encoding != "identity":
+            response.headers["Content-Encoding"] = encoding
+        response.set_etag(etag)
+        response.last_modified = self.last_modified
+        response.headers["Cache-Control"] = self.cache_control
+        response.headers["Vary"] = "Accept-Encoding"
+        # Werkzeug answers If-None-Match / If-Modified-Since with a bodiless 304
+        return response.make_conditional(request)
+
+IMMUTABLE_CACHE = "public, max-age=31536000, immutable"
+
+# Split the non-critical <style> and the inline <script> out into content-hashed static files so
+# browsers cache them forever and only the small HTML shell is revalidated
+_STYLE_RE = re.compile(r'<style>(.*?)</style>', re.S)
+_INLINE_SCRIPT_RE = re.compile(r'<script>(.*?)</script>', re.S)
+
+# Chart.js is pinned to one release. A build vendored under static/vendor is self-hosted
+# behind a content-hashed URL with an SRI hash of the exact bytes served; otherwise the
+# same release comes from jsDelivr, checked against CHART_JS_SRI when that is set
+CHART_JS_VERSION = "4.4.1"
+CHART_JS_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "static", "vendor", "chart.umd.min.js")
+CHART_JS_CDN_URL = f"https://cdn.jsdelivr.net/npm/chart.js@{CHART_JS_VERSION}/dist/chart.umd.min.js"
+CHART_JS_SRI = os.environ.get("CHART_JS_SRI", "")  # e.g. sha384-... for CHART_JS_CDN_URL
+CHART_JS_URL = CHART_JS_CDN_URL
+CHART_JS_INTEGRITY = CHART_JS_SRI
+_CHART_JS_ASSET = None
+if os.path.exists(CHART_JS_FILE):
+    with open(CHART_JS_FILE, "rb") as f:
+        _chart_js = f.read()
+    _CHART_JS_ASSET = PrecompressedAsset(_chart_js, "application/javascript", IMMUTABLE_CACHE)
+    CHART_JS_URL = f"/static/chart.{_CHART_JS_ASSET.digest[:10]}.js"
+    CHART_JS_INTEGRITY = "sha384-" + base64.b64encode(hashlib.sha384(_chart_js).digest()).decode("ascii")
+elif not CHART_JS_SRI:
+    logger.warning(f"⚠️ Chart.js {CHART_JS_VERSION} loads from jsDelivr without an integrity check - "
+                   f"vendor {CHART_JS_FILE} or set CHART_JS_SRI")
+
+_chart_js_preconnect = "" if _CHART_JS_ASSET else '<link rel="preconnect" href="https://cdn.jsdelivr.net" crossorigin>'
+DASHBOARD_HTML = (DASHBOARD_HTML.replace("__CHART_JS_PRECONNECT__", _chart_js_preconnect)
+                  .replace("__CHART_JS_URL__", CHART_JS_URL).replace("__CHART_JS_INTEGRITY__", CHART_JS_INTEGRITY))
+
+_dashboard_min = minify_html(DASHBOARD_HTML)
+_DASHBOARD_CSS_ASSET = PrecompressedAsset(
+    _STYLE_RE.search(_dashboard_min).group(1).strip().encode("utf-8"), "text/css", IMMUTABLE_CACHE
+)
+_DASHBOARD_JS_ASSET = PrecompressedAsset(
+    _INLINE_SCRIPT_RE.search(_dashboard_min).group(1).strip().encode("utf-8"), "application/javascript", IMMUTABLE_CACHE
+)
+DASHBOARD_CSS_URL = f"/static/dashboard.{_DASHBOARD_CSS_ASSET.digest[:10]}.css"
+DASHBOARD_JS_URL = f"/static/dashboard.{_DASHBOARD_JS_ASSET.digest[:10]}.js"
+
+# Critical CSS (<style data-critical>) stays inline; the rest loads without blocking first paint
+_dashboard_min = _STYLE_RE.sub(
+    lambda m: (f'<link rel="preload" href="{DASHBOARD_CSS_URL}" as="style" onload="this.onload=null;this.rel=\'stylesheet\'">'
+               f'<noscript><link rel="stylesheet" href="{DASHBOARD_CSS_URL}"></noscript>'),
+    _dashboard_min, count=1
+)
+_dashboard_min = _INLINE_SCRIPT_RE.sub(lambda m: f'<script src="{DASHBOARD_JS_URL}" defer></script>', _dashboard_min, count=1)
+
+_DASHBOARD_ASSET = PrecompressedAsset(
+    _dashboard_min.encode("utf-8"),
+    "text/html",
+    "public, max-age=30, must-revalidate"
+)
+
+# ============================================
+# API RESPONSES
+# ============================================
+def dumps_json(obj) -> bytes:
+    """Serialize an API payload to UTF-8 JSON bytes (orjson when available)"""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(obj, default=str).encode("utf-8")
+
+def ojsonify(obj) -> Response:
+    """Drop-in for jsonify that skips Flask's str -> bytes round trip"""
+    return Response(dumps_json(obj), mimetype="application/json")
+
+if ORJSON_AVAILABLE:
+    class OrjsonProvider(DefaultJSONProvider):
+        """Flask's own JSON handling (request.json, jsonify) through orjson too"""
+        
+        def dumps(self, obj, **kwargs):
+            return dumps_json(obj).decode("utf-8")
+        
+        def loads(self, s, **kwargs):
+            return orjson.loads(s)
+    
+    app.json = OrjsonProvider(app)
+
+def json_etag(body: bytes) -> str:
+    return hashlib.sha256(body).hexdigest()[:16]
+
+def conditional_json(obj, cache_control: str = "no-cache", etag: str = None) -> Response:
+    """ojsonify plus a content ETag so a revalidating browser gets a 304 when unchanged"""
+    body = obj if isinstance(obj, bytes) else dumps_json(obj)
+    response = Response(body, mimetype="application/json")
+    response.set_etag(etag or json_etag(body))
+    response.headers["Cache-Control"] = cache_control
+    return response.make_conditional(request)
+
+class TTLJsonCache:
+    """Serialized JSON body reused for `ttl` seconds so bursts of dashboard polls
+    don't rebuild and re-serialize the same dict"""
+    
+    def __init__(self, builder, ttl: float = 1.0):
+        self.builder = builder
+        self.ttl = ttl
+        self._expires_at = 0.0
+        self._body = b""
+        self._etag = ""
+        self._lock = threading.Lock()
+    
+    def response(self) -> Response:
+        with self._lock:
+            now = time.monotonic()
+            if now >= self._expires_at:
+                self._body = dumps_json(self.builder())
+                self._etag = json_etag(self._body)
+                self._expires_at = now + self.ttl
+            body, etag = self._body, self._etag
+        return conditional_json(body, f"public, max-age={int(self.ttl)}", etag)
+    
+    def invalidate(self):
+        with self._lock:
+            self._expires_at = 0.0
 
 # ============================================
 # API ROUTES
 # ============================================
 @app.route('/')
 def index():
-    return render_template_string(DASHBOARD_HTML)
+    return _DASHBOARD_ASSET.response()
+
+@app.route(DASHBOARD_CSS_URL)
+def dashboard_css():
+    return _DASHBOARD_CSS_ASSET.response()
+
+if _CHART_JS_ASSET:
+    @app.route(CHART_JS_URL)
+    def chart_js():
+        return _CHART_JS_ASSET.response()
+
+@app.route(DASHBOARD_JS_URL)
+def dashboard_js():
+    return _DASHBOARD_JS_ASSET.response()
+
+@app.after_request
+def default_cache_headers(response):
+    """Live /api/* data must not be cached unless the route opted into a TTL"""
+    if request.path.startswith('/api/') and "Cache-Control" not in response.headers:
+        response.headers["Cache-Control"] = "no-store"
+    return response
 
 @app.route('/api/summary')
 def api_summary():
-    return jsonify(get_summary())
+    return _summary_cache.response()
 
 @app.route('/api/trades')
 def api_trades():
-    return jsonify(load_data().get("trades", []))
+    """Session trades; ?since=<timestamp> returns only trades added after that cursor"""
+    trades = load_data().get("trades", [])
+    since = request.args.get("since")
+    if since:
+        # ISO timestamps from add_trade() sort lexicographically
+        return ojsonify([t for t in trades if t.get("timestamp", "") > since])
+    return conditional_json(trades)
+
+HISTORY_PAGE_MAX = 500
 
 @app.route('/api/history')
 def api_history():
-    return jsonify(load_trade_history())
+    """Trade history; with ?limit= (and ?offset=) one newest-first page plus the total"""
+    trades = trade_history()
+    if "limit" not in request.args:
+        return ojsonify({**load_trade_history(), "trades": trades})
+    limit = min(max(request.args.get("limit", 50, type=int) or 50, 1), HISTORY_PAGE_MAX)
+    offset = max(request.args.get("offset", 0, type=int) or 0, 0)
+    end = max(len(trades) - offset, 0)
+    page = trades[max(end - limit, 0):end][::-1]
+    return ojsonify({"trades": page, "total": len(trades), "offset": offset})
 
 @app.route('/api/position')
 def api_position():
     """Get current live positions with real-time P&L"""
+    return ojsonify(build_position())
+
+def build_position():
+    """Saved IC/Scalp positions in the shape the dashboard renders"""
     pos_data = load_position()
     
     result = {
@@ -3944,33 +3445,34 @@ def api_position():
         result["has_position"] = True
         result["daily_scalp"] = pos_data["daily_scalp"]
     
-    return jsonify(result)
-
-# Global references for live P&L (set by bot_thread)
-_live_ic = None
-_live_scalp = None
+    return result
 
 @app.route('/api/live_pnl')
 def api_live_pnl():
-    """Get real-time P&L for active positions"""
-    global _live_ic, _live_scalp
+    """Get real-time P&L for active positions.
     
-    strategy = request.args.get("strategy", "all")
+    `version` hashes the P&L payload (also sent as the ETag), so a client can
+    skip its DOM updates when prices haven't moved since the last poll.
+    """
+    result = build_live_pnl(request.args.get("strategy", "all"))
+    version = json_etag(dumps_json(result))
+    return conditional_json({**result, "version": version}, etag=version)
+
+def build_live_pnl(strategy: str = "all"):
+    """Live P&L as last published by the bot loop, falling back to the saved position.
+    
+    Reads the live_feed snapshot only: request threads never quote the broker
+    or touch strategy state (peak tracking etc.) that the bot thread owns.
+    """
     result = {
         "iron_condor": None,
         "daily_scalp": None
     }
     
-    # Try to get live P&L from strategy instances
-    if strategy in ["iron_condor", "all"] and _live_ic and _live_ic.position:
-        pnl_data = _live_ic.get_live_pnl()
-        if pnl_data:
-            result["iron_condor"] = pnl_data
-    
-    if strategy in ["daily_scalp", "all"] and _live_scalp and _live_scalp.position:
-        pnl_data = _live_scalp.get_live_pnl()
-        if pnl_data:
-            result["daily_scalp"] = pnl_data
+    _, published = live_feed.snapshot()
+    for name in ("iron_condor", "daily_scalp"):
+        if strategy in [name, "all"] and published.get(name):
+            result[name] = published[name]
     
     # Fallback to stored position data if live not available
     if not result["iron_condor"] and not result["daily_scalp"]:
@@ -3998,37 +3500,45 @@ def api_live_pnl():
                 "spot_sl_points": SCALP_SPOT_SL_POINTS
             }
     
-    return jsonify(result)
+    return result
 
 @app.route('/api/strategy', methods=['POST'])
 def api_strategy():
     data = load_data()
     data["strategy"] = request.json.get("strategy", "iron_condor")
     save_data(data)
-    return jsonify({"status": "success"})
+    invalidate_api_caches()
+    bot_wakeup.set()
+    return ojsonify({"status": "success"})
 
 @app.route('/api/session', methods=['POST'])
 def api_session():
     data = load_data()
     data["session_token"] = request.json.get("token", "")
     save_data(data)
-    return jsonify({"status": "success"})
+    invalidate_api_caches()
+    bot_wakeup.set()
+    return ojsonify({"status": "success"})
 
 @app.route('/api/bot/start', methods=['POST'])
 def api_bot_start():
     data = load_data()
     data["bot_running"] = True
     save_data(data)
+    invalidate_api_caches()
+    bot_wakeup.set()
     telegram.send("▶️ Bot started from dashboard")
-    return jsonify({"status": "success"})
+    return ojsonify({"status": "success"})
 
 @app.route('/api/bot/stop', methods=['POST'])
 def api_bot_stop():
     data = load_data()
     data["bot_running"] = False
     save_data(data)
+    invalidate_api_caches()
+    bot_wakeup.set()
     telegram.send("⏹️ Bot stopped from dashboard")
-    return jsonify({"status": "success"})
+    return ojsonify({"status": "success"})
 
 @app.route('/api/backtest', methods=['POST'])
 def api_backtest():
@@ -4057,12 +3567,12 @@ def api_backtest():
             use_historical_api=use_historical_api
         )
         
-        return jsonify(results)
+        return ojsonify(results)
     except Exception as e:
         logger.error(f"Backtest error: {e}")
         import traceback
         traceback.print_exc()
-        return jsonify({"error": str(e)}), 500
+        return ojsonify({"error": str(e)}), 500
 
 @app.route('/api/expiries', methods=['GET'])
 def api_expiries():
@@ -4076,7 +3586,7 @@ def api_expiries():
         
         expiries = get_weekly_expiries(start_date, end_date)
         
-        return jsonify({
+        return ojsonify({
             "start_date": start,
             "end_date": end,
             "count": len(expiries),
@@ -4084,26 +3594,27 @@ def api_expiries():
             "expiries_breeze": [format_expiry_for_breeze(e) for e in expiries]
         })
     except Exception as e:
-        return jsonify({"error": str(e)}), 500
+        return ojsonify({"error": str(e)}), 500
 
 @app.route('/health')
 def health():
-    return jsonify({"status": "ok", "time": datetime.now().isoformat()})
+    return ojsonify({"status": "ok", "time": datetime.now().isoformat()})
 
-@app.route('/api/status')
-def api_status():
-    """Get detailed bot status including timing info"""
+def build_status():
+    """Detailed bot status including timing info"""
+    # One clock read shared by every time-derived field below
     now = get_ist_now()
-    next_exp = get_next_expiry()
-    return jsonify({
+    now_utc = now.astimezone(timezone.utc) if now.tzinfo else datetime.now(timezone.utc)
+    next_exp = get_next_expiry(now)
+    return {
         "current_time_ist": now.strftime("%Y-%m-%d %H:%M:%S"),
-        "current_time_utc": datetime.utcnow().strftime("%Y-%m-%d %H:%M:%S"),
+        "current_time_utc": now_utc.strftime("%Y-%m-%d %H:%M:%S"),
         "entry_time_start": ENTRY_TIME_START,
         "entry_time_end": ENTRY_TIME_END,
         "exit_time": EXIT_TIME,
-        "is_trading_time": is_trading_time(),
-        "is_exit_time": is_exit_time(),
-        "is_market_hours": is_market_hours(),
+        "is_trading_time": is_trading_time(now),
+        "is_exit_time": is_exit_time(now),
+        "is_market_hours": is_market_hours(now),
         "next_expiry": next_exp.strftime("%d-%b-%Y"),
         "next_expiry_day": next_exp.strftime("%A"),
         "next_expiry_breeze": format_expiry_for_breeze(next_exp),
@@ -4129,13 +3640,82 @@ def api_status():
             "reentry_after_sl": IC_REENTRY_AFTER_SL,
             "daily_loss_limit": IC_DAILY_LOSS_LIMIT
         }
-    })
+    }
+
+_summary_cache = TTLJsonCache(get_summary)
+_status_cache = TTLJsonCache(build_status)
+_dashboard_cache = TTLJsonCache(lambda: {
+    "summary": get_summary(),
+    "status": build_status(),
+    "position": build_position(),
+    "trades": load_data().get("trades", []),
+    "live_pnl": build_live_pnl()
+})
+
+def invalidate_api_caches():
+    """Drop cached summary/status bodies after a dashboard/Telegram state change"""
+    for cache in (_summary_cache, _status_cache, _dashboard_cache):
+        cache.invalidate()
+
+@app.route('/api/status')
+def api_status():
+    """Get detailed bot status including timing info"""
+    return _status_cache.response()
+
+@app.route('/api/dashboard')
+def api_dashboard():
+    """Everything the dashboard refresh needs (summary, status, positions, trades, live P&L) in one response"""
+    return _dashboard_cache.response()
+
+# Each open stream pins one gunicorn thread (threads = 8 in gunicorn.conf.py), so cap
+# how many can be open and recycle them; EventSource reconnects on its own. Two streams
+# (e.g. two dashboard tabs) leave 6 threads for polling, backtest and control requests.
+SSE_MAX_STREAMS = 2
+SSE_STREAM_SECONDS = 300
+SSE_HEARTBEAT_SECONDS = 15
+_sse_slots = threading.BoundedSemaphore(SSE_MAX_STREAMS)
+
+def build_dashboard_event(live_pnl):
+    """Everything the live tab shows, pushed as one SSE message"""
+    return {"summary": get_summary(), "status": build_status(), "position": build_position(), "live_pnl": live_pnl}
+
+@app.route('/api/events')
+def api_events():
+    """Server-Sent Events stream that only pushes when dashboard data changes"""
+    if not _sse_slots.acquire(blocking=False):
+        return ojsonify({"error": "too many open event streams"}), 503
+    
+    def stream():
+        yield b"retry: 5000\n\n"
+        deadline = time.monotonic() + SSE_STREAM_SECONDS
+        last_state = None
+        last_sent = 0.0
+        while time.monotonic() < deadline:
+            version, live_pnl = live_feed.snapshot()
+            event = build_dashboard_event(live_pnl)
+            # The clock fields tick every second; they alone shouldn't trigger a push
+            state = dumps_json({**event, "status": {k: v for k, v in event["status"].items() if not k.startswith("current_time")}})
+            now = time.monotonic()
+            if state != last_state or now - last_sent >= SSE_HEARTBEAT_SECONDS:
+                yield b"data: " + dumps_json(event) + b"\n\n"
+                last_state = state
+                last_sent = now
+            # Wake on the next bot tick, or after a second for summary/status changes
+            live_feed.wait(version, timeout=1)
+    
+    response = Response(stream(), mimetype="text/event-stream")
+    response.headers["Cache-Control"] = "no-cache"
+    response.headers["X-Accel-Buffering"] = "no"
+    # Released on close even if the generator never started
+    response.call_on_close(_sse_slots.release)
+    return response
 
 @app.route('/api/settings', methods=['GET', 'POST'])
 def api_settings():
     """Get or update bot settings"""
     if request.method == 'GET':
-        return jsonify({
+        # Settings come from env vars and only change on redeploy
+        return conditional_json({
             "entry_time_start": ENTRY_TIME_START,
             "entry_time_end": ENTRY_TIME_END,
             "exit_time": EXIT_TIME,
@@ -4178,8 +3758,8 @@ def api_settings():
             "scalp_min_premium": SCALP_MIN_PREMIUM,
             "scalp_max_vix": SCALP_MAX_VIX,
             "scalp_min_vix": SCALP_MIN_VIX
-        })
-    return jsonify({"status": "settings are read-only, configure via environment variables"})
+        }, "private, max-age=300")
+    return ojsonify({"status": "settings are read-only, configure via environment variables"})
 
 # ============================================
 # START BOT THREAD (works with both gunicorn and direct run)
@@ -4196,8 +3776,9 @@ def start_bot_thread():
         bot.start()
         logger.info("🤖 Bot thread started")
 
-# Auto-start bot thread on import (for gunicorn)
-start_bot_thread()
+# Auto-start bot thread on import, unless gunicorn.conf.py starts it in the worker after fork
+if not os.environ.get("BOT_START_IN_WORKER"):
+    start_bot_thread()
 
 # ============================================
 # MAIN (for direct python app.py)
@@ -0,0 +1,24 @@
+"""Gunicorn settings for Railway (Procfile: gunicorn app:app -c gunicorn.conf.py)"""
+import os
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '5000')}"
+
+# One worker: the trading bot runs inside the web process and must exist exactly once
+workers = 1
+worker_class = "gthread"
+# Up to SSE_MAX_STREAMS of these are held by open dashboard event streams
+threads = 8
+# Let the dashboard reuse one connection across its requests
+keepalive = 30
+timeout = 120
+preload_app = True
+
+# With preload the app is imported in the master, and a thread started there
+# never reaches the forked worker that serves the dashboard. Defer the bot to
+# post_fork so live P&L and the event stream share its process.
+os.environ["BOT_START_IN_WORKER"] = "1"
+
+
+def post_fork(server, worker):
+    import app
+    app.start_bot_thread()